@@ -1,15 +1,28 @@
+import logging
 import streamlit as st
-import yaml
+import os
 import threading
-import pandas as pd
 from datetime import datetime, time as dt_time
 import time
 import streamlit.components.v1 as components
 import uuid
 
 # Imports locaux
-from database.db import init_db, add_task, get_tasks, mark_done, delete_task, get_groups, add_group, delete_group
+from database.db import (init_db, add_task, query_tasks, count_tasks, search_tasks, get_upcoming_deadlines,
+                         get_data_version,
+                         mark_done, delete_task, mark_done_many, delete_many, add_group, delete_group,
+                         add_series, get_series, stop_series, delete_archived)
+from database.facets import get_facets, get_group_names
+from database.listener import start_listener
+from modules.views import classify_tasks, STATE_OVERDUE, STATE_UPCOMING, STATE_NODATE, STATE_DONE
 from modules.scheduler import run_scheduler
+from modules.recurrence import FREQ_CHOICES, describe_rule
+from modules.settings import settings, priority_ids
+from modules.observability import setup_logging, start_metrics_server, UI_RERUN_SECONDS
+
+setup_logging()
+log = logging.getLogger("app")
+_rerun_start = time.perf_counter()  # Durée du rerun complet (métrique polytask_ui_rerun_seconds)
 
 # ==============================================================================
 # 1. SETUP & INITIALISATION
@@ -17,20 +30,32 @@ from modules.scheduler import run_scheduler
 
 st.set_page_config(page_title="PolyTask", page_icon="✅", layout="wide")
 
-# Chargement Config
-try:
-    with open('config/config.yaml') as f:
-        config = yaml.safe_load(f)
-except FileNotFoundError:
-    st.error("❌ Fichier config/config.yaml introuvable.")
-    st.stop()
+# Config partagée par toutes les sessions : parsée et validée une fois, relue
+# seulement si config.yaml change (voir modules/settings.py)
+config = settings.get()
+if settings.error:
+    st.warning(f"⚠️ config/config.yaml ignoré : {settings.error}")
 
 # Lancement BDD et Scheduler (Background)
-if 'init_done' not in st.session_state:
+# cache_resource : exécuté une seule fois par processus (init_db aussi), et non par session
+# navigateur (sinon chaque onglet lançait son propre thread scheduler).
+# Entre processus, le verrou consultatif Postgres garantit un seul scheduler actif.
+# SCHEDULER_MODE=external : le scheduler tourne dans son propre processus
+# (python -m modules.scheduler, service docker-compose dédié), l'UI ne le lance pas.
+SCHEDULER_MODE = os.getenv("SCHEDULER_MODE", "embedded").lower()
+
+@st.cache_resource
+def start_background():
     init_db()
-    t = threading.Thread(target=run_scheduler, daemon=True)
+    start_listener()  # Invalide les caches (facettes...) sur toute écriture en base
+    start_metrics_server()  # Si METRICS_PORT est défini (une fois par processus)
+    if SCHEDULER_MODE == "external":
+        return None
+    t = threading.Thread(target=run_scheduler, daemon=True, name="polytask-scheduler")
     t.start()
-    st.session_state.init_done = True
+    return t
+
+start_background()
 
 # --- GESTION DU "FORM ID" (Anti-Fantôme) ---
 if 'form_id' not in st.session_state:
@@ -40,8 +65,8 @@ def reset_form():
     """Incrémente l'ID, forçant Streamlit à générer de nouveaux widgets vides."""
     st.session_state.form_id += 1
 
-available_groups = get_groups()
-priorities_map = {v: k for k, v in config['priorities'].items()}
+available_groups = get_group_names()
+priorities_map = settings.derived(priority_ids)
 
 # ==============================================================================
 # 2. CALLBACK D'AJOUT (Logique Métier)
@@ -58,7 +83,7 @@ def add_task_callback():
     prio_val = priorities_map.get(prio_key, 2)
     
     tags_str = st.session_state.get(f"tags_{fid}", "")
-    tags = [t.strip() for t in tags_str.split(',') if t]
+    tags = [t for t in (t.strip() for t in tags_str.split(',')) if t]
 
     # Gestion Date
     due_val = None
@@ -69,11 +94,22 @@ def add_task_callback():
             m = int(st.session_state.get(f"m_{fid}", 0))
             due_val = datetime.combine(d, dt_time(h, m))
         except Exception as e:
-            print(f"Erreur date: {e}")
+            log.warning("Erreur date: %s", e)
+
+    # Récurrence (la première occurrence tombe à l'échéance saisie)
+    freq = FREQ_CHOICES.get(st.session_state.get(f"freq_{fid}"))
+    if freq and due_val is None:
+        st.error("⚠️ Une tâche récurrente a besoin d'une échéance.")
+        return
 
     # Validation et Ajout
     if title:
-        add_task(title, desc, group, prio_val, tags, due_val)
+        if freq:
+            every = int(st.session_state.get(f"every_{fid}", 1))
+            max_count = int(st.session_state.get(f"count_{fid}", 0)) or None
+            add_series(title, desc, group, prio_val, tags, freq, every, due_val, max_count=max_count)
+        else:
+            add_task(title, desc, group, prio_val, tags, due_val)
         st.toast(f"Tâche '{title}' ajoutée !", icon="✅")
         # CRUCIAL : On change l'ID pour le prochain affichage -> Reset visuel
         reset_form()
@@ -90,7 +126,7 @@ with st.sidebar:
     if st.button("🔔 Autoriser Notifications"):
         components.html("""<script>Notification.requestPermission()</script>""", height=0)
 
-    tab_task, tab_group = st.tabs(["Nouvelle Tâche", "Gérer Groupes"])
+    tab_task, tab_group, tab_series = st.tabs(["Nouvelle Tâche", "Gérer Groupes", "Séries"])
     
     # --- FORMULAIRE AVEC CLÉS DYNAMIQUES ---
     with tab_task:
@@ -123,6 +159,13 @@ with st.sidebar:
                 mins = [f"{i:02d}" for i in range(60)]
                 st.selectbox("M", mins, index=0, label_visibility="collapsed", key=f"m_{fid}")
 
+            # Répétition : une seule occurrence en attente à la fois (voir modules/recurrence.py)
+            freq_label = st.selectbox("🔁 Répétition", list(FREQ_CHOICES), key=f"freq_{fid}")
+            if FREQ_CHOICES[freq_label]:
+                cr1, cr2 = st.columns(2)
+                cr1.number_input("Tous les", min_value=1, max_value=365, value=1, key=f"every_{fid}")
+                cr2.number_input("Nb de fois (0 = sans fin)", min_value=0, value=0, key=f"count_{fid}")
+
         st.text_input("Tags (sep. virgule)", key=f"tags_{fid}")
         
         # Boutons d'action
@@ -145,154 +188,277 @@ with st.sidebar:
                     st.rerun()
                 else: st.error("Existe déjà")
         
+        # Groupes avec leur nombre de tâches en cours (facettes en cache)
+        for name, count in get_facets('pending')['groups']:
+            st.caption(f"📂 {name} — {count} en cours")
+
         st.divider()
         g_del = st.selectbox("Supprimer", available_groups, key="g_del")
         if st.button("Confirmer Suppression", type="primary"):
             delete_group(g_del)
             st.rerun()
 
+    # --- SÉRIES RÉCURRENTES ---
+    with tab_series:
+        series = get_series()
+        if not series:
+            st.caption("Aucune série active.")
+        for s in series:
+            with st.container(border=True):
+                st.markdown(f"🔁 **{s['title']}**")
+                st.caption(describe_rule(s['freq'], s['every'], s['until_at'], s['max_count']))
+                if s['next_due']:
+                    st.caption(f"📅 Prochaine : {s['next_due'].strftime('%d/%m %H:%M')}")
+                st.button("⏹️ Arrêter", key=f"stop_series_{s['id']}", on_click=stop_series, args=(s['id'],))
+
 # ==============================================================================
 # 4. PAGE PRINCIPALE
 # ==============================================================================
 st.title(f"🚀 {config['app_name']}")
 
-# Fonction d'affichage d'une carte (Robuste aux erreurs de données)
-def display_task_card(row, state="normal"):
-    prio_colors = {3: "red", 2: "orange", 1: "green"}
-    color = prio_colors.get(row['priority'], "grey")
+# Fonction d'affichage d'une carte (TaskCard préparée par modules/views.py)
+PRIO_COLORS = {3: "red", 2: "orange", 1: "green"}
+
+def display_task_card(card, on_delete=delete_task):
+    color = PRIO_COLORS.get(card.priority, "grey")
+    state = card.state
     
     with st.container(border=True):
         c1, c2, c3, c4 = st.columns([0.5, 4, 2, 0.5])
         
         # Valider
-        if row['status'] == 'pending':
-            if c1.button("✅", key=f"ok_{row['id']}"):
-                mark_done(row['id'])
-                st.rerun()
+        if card.status == 'pending':
+            # Callback exécuté AVANT le rerun (du fragment) : la liste est déjà à jour
+            c1.button("✅", key=f"ok_{card.id}", on_click=mark_done, args=(card.id,))
         else:
             c1.write("🏁")
 
         # Infos
         with c2:
             prefix = "🔥 " if state == 'overdue' else "⏳ " if state == 'upcoming' else ""
-            st.markdown(f":{color}[●] **{prefix}{row['title']}**")
-            if row['description']: st.caption(row['description'])
+            st.markdown(f":{color}[●] **{prefix}{card.title}**")
+            if card.description: st.caption(card.description)
             
             # Affichage Tags (Sécurité type list)
-            tags = row['tags'] if isinstance(row['tags'], list) else []
-            if tags: st.write(" ".join([f"`#{t}`" for t in tags]))
+            if isinstance(card.tags, list) and card.tags:
+                st.write(" ".join([f"`#{t}`" for t in card.tags]))
 
         # Métadonnées
         with c3:
-            st.caption(f"📂 {row['group_name']}")
-            # Gestion Date (Sécurité NaT)
-            if not pd.isna(row['due_date']):
-                try:
-                    d_obj = row['due_date'].to_pydatetime() if hasattr(row['due_date'], 'to_pydatetime') else row['due_date']
-                    d_str = d_obj.strftime('%d/%m %H:%M')
-                    if state == 'overdue': st.markdown(f":red[**🚨 {d_str}**]")
-                    elif state == 'upcoming': st.markdown(f":blue[📅 {d_str}]")
-                    else: st.caption(f"📅 {d_str}")
-                except: pass
+            st.caption(f"📂 {card.group_name}" + (" · 🔁" if card.series_id else ""))
+            # Date déjà formatée (None si pas d'échéance)
+            if card.due_str:
+                if state == 'overdue': st.markdown(f":red[**🚨 {card.due_str}**]")
+                elif state == 'upcoming': st.markdown(f":blue[📅 {card.due_str}]")
+                else: st.caption(f"📅 {card.due_str}")
             elif state == 'nodate':
                 st.caption("♾️ Pas de date")
 
         # Supprimer
-        if c4.button("🗑️", key=f"del_{row['id']}"):
-            delete_task(row['id'])
-            st.rerun()
+        c4.button("🗑️", key=f"del_{card.id}", on_click=on_delete, args=(card.id,))
+
+# --- RAFRAÎCHISSEMENT INCRÉMENTAL ---
+# Seule la liste des tâches (fragment) se rafraîchit périodiquement. À chaque
+# passage, une requête triviale (get_data_version) dit si les données ont changé ;
+# sinon les résultats mémorisés de la session sont réutilisés tels quels.
+REFRESH_SEC = config['refresh_seconds']
+MEMO_MAX = 200  # Nombre max de résultats mémorisés par session
+
+def sync_data_version(now):
+    """Oublie les résultats mémorisés de la session si les données ont changé."""
+    version = get_data_version(now)
+    if st.session_state.get('data_version') != version:
+        st.session_state.data_version = version
+        st.session_state.memo = {}
+    return version
+
+def memo(fn, **kwargs):
+    """Appelle fn(**kwargs) une seule fois par version des données (et par session)."""
+    store = st.session_state.setdefault('memo', {})
+    key = (fn.__name__, repr(sorted(kwargs.items())))
+    if key not in store:
+        if len(store) >= MEMO_MAX:
+            store.clear()
+        store[key] = fn(**kwargs)
+    return store[key]
+
+# --- SECTIONS PARESSEUSES (Requête + rendu uniquement si ouvertes) ---
+PAGE_SIZE = config['page_size']
+
+def show_more(key):
+    """Agrandit la fenêtre affichée d'une section ("Afficher plus")."""
+    st.session_state[f"limit_{key}"] = st.session_state.get(f"limit_{key}", PAGE_SIZE) + PAGE_SIZE
+
+def lazy_section(key, header, count, filters, sort, pending, default_open=True):
+    """Section repliable : tant qu'elle est fermée, aucune requête ni widget n'est créé.
+
+    Ouverte, elle n'affiche que les `limit` premières cartes, agrandies par pages
+    de PAGE_SIZE : le coût d'un rerun ne dépend plus de la taille de l'historique.
+    """
+    if not count:
+        return
+    ch, ct = st.columns([5, 1])
+    with ch:
+        header(count)
+    if not ct.toggle("Afficher", value=default_open, key=f"open_{key}"):
+        return
+
+    limit = st.session_state.get(f"limit_{key}", PAGE_SIZE)
+    tasks, _ = memo(query_tasks, **filters, sort=sort, limit=limit)
+    for card in classify_tasks(tasks, datetime.now(), pending=pending):
+        display_task_card(card)
+    if count > limit:
+        st.button(f"⬇️ Afficher plus ({count - limit} restantes)", key=f"more_{key}",
+                  on_click=show_more, args=(key,))
+
+ARCHIVE_DAYS = config['archive_after_days']
+
+def archive_section(filters):
+    """Historique froid (tasks_archive) : ni comptage ni lecture tant qu'il n'est pas demandé."""
+    if not ARCHIVE_DAYS or not st.toggle(f"🗄️ Archives (terminées il y a plus de {ARCHIVE_DAYS} jours)",
+                                         key="open_archive"):
+        return
+    total = memo(count_tasks, archived=True, **filters)
+    if not total:
+        st.caption("Aucune tâche archivée ne correspond aux critères.")
+        return
+    limit = st.session_state.get("limit_archive", PAGE_SIZE)
+    tasks, _ = memo(query_tasks, archived=True, **filters, sort='recent', limit=limit)
+    for card in classify_tasks(tasks, datetime.now(), pending=False):
+        display_task_card(card, on_delete=delete_archived)
+    if total > limit:
+        st.button(f"⬇️ Afficher plus ({total - limit} restantes)", key="more_archive",
+                  on_click=show_more, args=("archive",))
+
+def bulk_table(filters, sort, total):
+    """Mode tableau compact : une page de st.dataframe + actions groupées sur la sélection."""
+    n_pages = max(1, -(-total // PAGE_SIZE))
+    page = min(st.session_state.get('page', 1), n_pages)
+    tasks, _ = memo(query_tasks, **filters, sort=sort, limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE)
+    prio_labels = config['priorities']
+
+    # Colonnes -> listes (converties par st.dataframe, sans DataFrame côté app)
+    table = {col: [getattr(t, col) for t in tasks]
+             for col in ('title', 'group_name', 'priority', 'due_date', 'tags')}
+    table['priority'] = [prio_labels.get(p) for p in table['priority']]
+    # La sélection revient en positions de lignes : la clé change avec les données
+    # (version, filtres, page) pour qu'une ancienne sélection ne vise jamais d'autres tâches
+    key = f"table_{st.session_state.data_version[0]}_{hash(tuple(t.id for t in tasks))}"
+    event = st.dataframe(
+        table, hide_index=True,
+        on_select="rerun", selection_mode="multi-row", key=key,
+        column_config={
+            'title': "Titre", 'group_name': "Groupe", 'priority': "Priorité",
+            'due_date': st.column_config.DatetimeColumn("Échéance", format="DD/MM HH:mm"),
+            'tags': "Tags",
+        },
+    )
+    selected = [tasks[i].id for i in event.selection.rows if 0 <= i < len(tasks)]
+
+    def run_bulk(action, ids):
+        st.session_state.pop(key, None)  # Sélection consommée
+        action(ids)
+
+    cb1, cb2, cb3 = st.columns([1, 1, 3])
+    cb1.button(f"✅ Terminer ({len(selected)})", disabled=not selected,
+               on_click=run_bulk, args=(mark_done_many, selected))
+    cb2.button(f"🗑️ Supprimer ({len(selected)})", disabled=not selected,
+               on_click=run_bulk, args=(delete_many, selected))
+    if n_pages > 1:
+        cb3.number_input(f"Page (sur {n_pages}, {total} tâches)", min_value=1, max_value=n_pages,
+                         step=1, key='page')
+
+# --- LISTE DES TÂCHES (Fragment rafraîchi toutes les REFRESH_SEC secondes) ---
+def render_task_list():
+    now = datetime.now()
+    next_due = sync_data_version(now)[1]
 
-# --- FILTRES ---
-main_container = st.container()
-with main_container:
     with st.expander("🔍 Filtres", expanded=True):
         c1, c2, c3, c4 = st.columns(4)
         search = c1.text_input("Recherche")
         
-        # Récupération tags uniques
-        df_raw = get_tasks()
-        all_tags = set()
-        if not df_raw.empty and 'tags' in df_raw.columns:
-            for t in df_raw['tags'].dropna():
-                if isinstance(t, list): all_tags.update(t)
-        
-        tags_sel = c2.multiselect("Tags", sorted(list(all_tags)))
-        prio_sel = c3.multiselect("Priorité", list(priorities_map.keys()))
         mode = c4.radio("Vue", ["En cours", "Terminées"], horizontal=True)
-        view_type = st.radio("Style", ["Liste", "Par Groupe"], horizontal=True)
-
-    # Récupération Données
-    status_db = 'pending' if mode == "En cours" else 'done'
-    df = get_tasks(status_db)
-
-    # Filtrage
-    if not df.empty:
-        if search:
-            df = df[df['title'].str.contains(search, case=False, na=False) | 
-                    df['description'].str.contains(search, case=False, na=False)]
-        if tags_sel:
-            df = df[df['tags'].apply(lambda x: bool(set(x) & set(tags_sel)) if isinstance(x, list) else False)]
-        if prio_sel:
-            p_ints = [priorities_map[p] for p in prio_sel]
-            df = df[df['priority'].isin(p_ints)]
-
-    # Notifications JS (Injecté uniquement si besoin)
-    now = datetime.now()
-    if not df.empty:
-        for _, row in df.iterrows():
-            if not pd.isna(row['due_date']):
-                try:
-                    d_obj = row['due_date'].to_pydatetime() if hasattr(row['due_date'], 'to_pydatetime') else row['due_date']
-                    diff = (d_obj - now).total_seconds()
-                    # Si échéance dans la minute
-                    if 0 < diff < 60:
-                        uid = uuid.uuid4()
-                        js = f"""<script>(function(){{if(Notification.permission==="granted"){{new Notification("⏰ Rappel",{{body:"{row['title']} arrive à échéance !",icon:"https://cdn-icons-png.flaticon.com/512/2693/2693507.png"}});}}}})();</script><div style="display:none">{uid}</div>"""
-                        components.html(js, height=0)
-                except: pass
-
-    # --- RENDU 3 SECTIONS ---
-    if df.empty:
-        st.info("Aucune tâche ne correspond aux critères.")
-    else:
-        if view_type == "Liste":
-            if mode == "En cours":
-                # Tri des DataFrames
-                over = df[(df['due_date'].notna()) & (df['due_date'] < now)].sort_values(by='priority', ascending=False)
-                upco = df[(df['due_date'].notna()) & (df['due_date'] >= now)].sort_values(by='due_date')
-                noda = df[df['due_date'].isna()].sort_values(by='priority', ascending=False)
-
-                if not over.empty:
-                    st.error(f"🔥 **EN RETARD ({len(over)})**")
-                    for _, r in over.iterrows(): display_task_card(r, 'overdue')
-                    st.divider()
-
-                if not upco.empty:
-                    st.info(f"📅 **À VENIR ({len(upco)})**")
-                    for _, r in upco.iterrows(): display_task_card(r, 'upcoming')
-                    st.divider()
-
-                if not noda.empty:
-                    st.write(f"♾️ **SANS ÉCHÉANCE ({len(noda)})**")
-                    for _, r in noda.iterrows(): display_task_card(r, 'nodate')
-            else:
-                st.success("🏁 **TERMINÉES**")
-                for _, r in df.sort_values(by='id', ascending=False).iterrows(): display_task_card(r, 'done')
-        
-        else: # Par Groupe
-            groups = sorted(df['group_name'].unique())
-            for grp in groups:
-                sub_df = df[df['group_name'] == grp].sort_values(by=['priority', 'due_date'], ascending=[False, True])
-                with st.expander(f"📂 {grp} ({len(sub_df)})", expanded=True):
-                    for _, r in sub_df.iterrows():
-                        state = 'done'
-                        if mode == "En cours":
-                            if pd.isna(r['due_date']): state = 'nodate'
-                            else:
-                                d_obj = r['due_date'].to_pydatetime() if hasattr(r['due_date'], 'to_pydatetime') else r['due_date']
-                                state = 'overdue' if d_obj < now else 'upcoming'
-                        display_task_card(r, state)
-
-# Refresh Auto
-time.sleep(60)
-st.rerun()
\ No newline at end of file
+        status_db = 'pending' if mode == "En cours" else 'done'
+
+        # Tags de la vue courante avec compteurs (facettes en cache, agrégées par Postgres)
+        tag_counts = dict(get_facets(status=status_db)['tags'])
+        tags_sel = c2.multiselect("Tags", list(tag_counts),
+                                  format_func=lambda t: f"{t} ({tag_counts.get(t, 0)})")
+        prio_sel = c3.multiselect("Priorité", list(priorities_map.keys()))
+        view_type = st.radio("Style", ["Liste", "Par Groupe", "Tableau"], horizontal=True)
+
+    # Filtres communs, exécutés par Postgres
+    filters = dict(
+        search=search or None,
+        tags=tags_sel,
+        priorities=[priorities_map[p] for p in prio_sel],
+        status=status_db,
+    )
+    pending = (mode == "En cours")
+
+    # Meilleurs résultats plein texte (classés, avec extrait surligné)
+    if search:
+        hits = memo(search_tasks, query=search, limit=5, status=status_db)
+        if hits:
+            with st.expander(f"🔎 Meilleurs résultats pour « {search} »", expanded=True):
+                for hit in hits:
+                    st.markdown(f"**{hit['title']}** · 📂 {hit['group_name']}")
+                    st.caption(hit['snippet'])
+
+    # Notifications JS (Injecté uniquement si besoin) : tâches dues dans la minute
+    # (la prochaine échéance est connue via la version : requête seulement si imminente)
+    imminent = next_due is not None and (next_due - now).total_seconds() < 60
+    for row in (get_upcoming_deadlines(horizon_sec=60, grace_sec=0, now=now) if imminent else []):
+        if row.due_date > now:
+            uid = uuid.uuid4()
+            js = f"""<script>(function(){{if(Notification.permission==="granted"){{new Notification("⏰ Rappel",{{body:"{row.title} arrive à échéance !",icon:"https://cdn-icons-png.flaticon.com/512/2693/2693507.png"}});}}}})();</script><div style="display:none">{uid}</div>"""
+            components.html(js, height=0)
+
+    # --- RENDU ---
+    # Compteurs agrégés d'abord (une requête), les lignes seulement à l'ouverture
+    if view_type == "Tableau":
+        total = memo(count_tasks, **filters)
+        if not total:
+            st.info("Aucune tâche ne correspond aux critères.")
+        else:
+            bulk_table(filters, 'smart' if pending else 'recent', total)
+
+    elif view_type == "Liste":
+        if pending:
+            counts = memo(count_tasks, by='bucket', **filters)
+            if not counts:
+                st.info("Aucune tâche ne correspond aux critères.")
+            lazy_section(STATE_OVERDUE, lambda n: st.error(f"🔥 **EN RETARD ({n})**"),
+                         counts.get(STATE_OVERDUE, 0), dict(filters, bucket=STATE_OVERDUE), 'smart', True)
+            lazy_section(STATE_UPCOMING, lambda n: st.info(f"📅 **À VENIR ({n})**"),
+                         counts.get(STATE_UPCOMING, 0), dict(filters, bucket=STATE_UPCOMING), 'smart', True)
+            lazy_section(STATE_NODATE, lambda n: st.write(f"♾️ **SANS ÉCHÉANCE ({n})**"),
+                         counts.get(STATE_NODATE, 0), dict(filters, bucket=STATE_NODATE), 'smart', True)
+        else:
+            total = memo(count_tasks, **filters)
+            if not total:
+                st.info("Aucune tâche ne correspond aux critères.")
+            # Historique replié par défaut : rien n'est chargé tant qu'on ne l'ouvre pas
+            lazy_section(STATE_DONE, lambda n: st.success(f"🏁 **TERMINÉES ({n})**"),
+                         total, filters, 'recent', False, default_open=False)
+
+    else: # Par Groupe
+        counts = memo(count_tasks, by='group', **filters)
+        if not counts:
+            st.info("Aucune tâche ne correspond aux critères.")
+        for grp, n in counts.items():
+            lazy_section(f"grp_{grp}", lambda n, grp=grp: st.subheader(f"📂 {grp} ({n})"),
+                         n, dict(filters, group=grp), 'group', pending,
+                         default_open=(pending and n <= PAGE_SIZE))
+
+    # Terminées : historique récent ci-dessus (table chaude), plus ancien à la demande
+    if not pending:
+        archive_section(filters)
+
+@st.fragment(run_every=REFRESH_SEC)
+def task_list():
+    with UI_RERUN_SECONDS.labels("fragment").time():
+        render_task_list()
+
+task_list()
+UI_RERUN_SECONDS.labels("app").observe(time.perf_counter() - _rerun_start)
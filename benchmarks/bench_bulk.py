@@ -0,0 +1,74 @@
+"""Écritures : une requête par tâche (add_task / mark_done / delete_task) vs API groupées.
+
+Usage : python benchmarks/bench_bulk.py [--sizes 200 5000]
+Nécessite une base Postgres accessible via les variables DB_* (.env).
+Chaque mesure repart d'un schéma de bench vide (les écritures ne sont pas rejouables).
+"""
+import argparse
+import io
+import time
+
+from common import TASK_FIELDS, fake_tasks, reset_schema
+from database.db import (add_task, add_tasks, mark_done, mark_done_many,
+                         delete_task, delete_many, get_connection)
+from database.transfer import export_tasks, import_tasks
+
+def task_dicts(n):
+    return [dict(zip(TASK_FIELDS, row)) for row in fake_tasks(n)]
+
+def all_ids():
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id FROM tasks ORDER BY id")
+            return [row[0] for row in cur.fetchall()]
+    finally:
+        conn.close()
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def report(label, n, seconds):
+    print(f"{label:<40} {seconds * 1000:10.1f} ms | {n / seconds:10.0f} tâches/s")
+
+def one_by_one(tasks):
+    reset_schema()
+    report("add_task (ligne à ligne)", len(tasks), timed(lambda: [
+        add_task(t['title'], t['description'], t['group_name'], t['priority'], t['tags'], t['due_date'])
+        for t in tasks]))
+    ids = all_ids()
+    report("mark_done (ligne à ligne)", len(ids), timed(lambda: [mark_done(i) for i in ids]))
+    report("delete_task (ligne à ligne)", len(ids), timed(lambda: [delete_task(i) for i in ids]))
+
+def bulk(tasks):
+    reset_schema()
+    report("add_tasks (execute_values)", len(tasks), timed(lambda: add_tasks(tasks)))
+    ids = all_ids()
+    report("mark_done_many (= ANY)", len(ids), timed(lambda: mark_done_many(ids)))
+    report("delete_many (= ANY)", len(ids), timed(lambda: delete_many(ids)))
+
+def transfer(tasks):
+    reset_schema()
+    add_tasks(tasks)
+    for fmt in ("csv", "json"):
+        buffer = io.StringIO()
+        report(f"export {fmt} (curseur serveur)", len(tasks), timed(lambda: export_tasks(buffer, fmt)))
+        buffer.seek(0)
+        report(f"import {fmt} (flux + add_tasks)", len(tasks), timed(lambda: import_tasks(buffer, fmt)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 5_000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        tasks = task_dicts(size)
+        print(f"\n=== {size} tâches ===")
+        one_by_one(tasks)
+        bulk(tasks)
+        transfer(tasks)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Rendu de la vue "Liste" : ancien chemin Pandas (table entière + iterrows) vs chemin d'app.py.
+
+Usage : python benchmarks/bench_render.py [--sizes 1000 10000]
+Nécessite une base Postgres accessible via les variables DB_* (.env).
+Le chemin mesuré est celui de l'app : count_tasks(by='bucket') puis, par section,
+query_tasks(bucket=..., limit=page) -> classify_tasks. Le "rendu" est simulé
+(formatage des champs affichés par carte), Streamlit n'étant pas exécutable hors serveur.
+"""
+import argparse
+from datetime import datetime
+
+import pandas as pd
+
+from common import bench, fake_render, render_list_view, report, reset_schema, seed_tasks
+from database.db import get_tasks
+
+def legacy_pipeline(now):
+    """Reproduction de l'ancien app.py : table entière en DataFrame, filtres par section + iterrows."""
+    df = get_tasks.uncached(status='pending')
+    df['due_date'] = pd.to_datetime(df['due_date'])
+    over = df[(df['due_date'].notna()) & (df['due_date'] < now)].sort_values(by='priority', ascending=False)
+    upco = df[(df['due_date'].notna()) & (df['due_date'] >= now)].sort_values(by='due_date')
+    noda = df[df['due_date'].isna()].sort_values(by='priority', ascending=False)
+    for section in (over, upco, noda):
+        for _, r in section.iterrows():
+            d_str = None
+            if not pd.isna(r['due_date']):
+                d_str = r['due_date'].to_pydatetime().strftime('%d/%m %H:%M')
+            fake_render(r['title'], r['group_name'], d_str)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    now = datetime.now()
+    for size in args.sizes:
+        reset_schema()
+        seed_tasks(size)
+        print(f"\n=== {size} tâches ===")
+        report("Ancien chemin (table entière + iterrows)", bench(lambda: legacy_pipeline(now), args.repeat))
+        report(f"App (sections, pages de {args.page_size})",
+               bench(lambda: render_list_view(now, args.page_size), args.repeat))
+
+if __name__ == "__main__":
+    main()
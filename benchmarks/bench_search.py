@@ -0,0 +1,33 @@
+"""Recherche : filtre Pandas (str.contains) vs plein texte Postgres (search_tasks).
+
+Usage : python benchmarks/bench_search.py [--sizes 10000 100000] [--query "backup postgres"]
+Nécessite une base Postgres accessible via les variables DB_* (.env).
+"""
+import argparse
+
+from common import bench, report, reset_schema, seed_tasks
+from database.db import get_tasks, search_tasks, query_tasks
+
+def pandas_search(query):
+    df = get_tasks.uncached()  # Sans le cache des lectures : on mesure bien la requête
+    return df[df['title'].str.contains(query, case=False, na=False) |
+              df['description'].str.contains(query, case=False, na=False)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--query", default="backup")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        reset_schema()
+        seed_tasks(size)
+        print(f"\n=== {size} tâches, recherche « {args.query} » ===")
+        report("Pandas (get_tasks + str.contains)", bench(lambda: pandas_search(args.query), args.repeat))
+        report("Postgres search_tasks (top 20, classé)", bench(lambda: search_tasks(args.query), args.repeat))
+        report("Postgres query_tasks (page de 50)",
+               bench(lambda: query_tasks(search=args.query, limit=50), args.repeat))
+
+if __name__ == "__main__":
+    main()
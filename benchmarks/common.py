@@ -0,0 +1,147 @@
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+# ==============================================================================
+# OUTILS COMMUNS DES BENCHMARKS
+# ==============================================================================
+# Les benchmarks tournent dans un schéma Postgres dédié (par défaut
+# 'polytask_bench') pour ne jamais toucher aux vraies tâches : PGOPTIONS fixe le
+# search_path de toutes les connexions libpq, y compris celles du pool.
+BENCH_SCHEMA = os.getenv("BENCH_SCHEMA", "polytask_bench")
+os.environ["PGOPTIONS"] = f"-c search_path={BENCH_SCHEMA},public"
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from psycopg2.extras import execute_values  # noqa: E402
+from database.db import connect_dedicated, init_db, dispose_pool  # noqa: E402
+
+WORDS = (
+    "deploy traefik backup postgres docker réseau facture rapport courses sport "
+    "lecture banque impôts médecin réunion client serveur certificat dns proxy "
+    "migration release revue budget voyage jardin cuisine ménage vélo garage"
+).split()
+
+def reset_schema():
+    """(Re)crée le schéma de bench vide, puis y applique schema.sql."""
+    conn = connect_dedicated()
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        cur.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+    conn.close()
+    dispose_pool()
+    init_db(force=True)
+
+# Profils d'échéances : part de tâches datées et répartition des dates
+DUE_PROFILES = {
+    # 70 % datées, uniformément de -7 j à +30 j
+    "uniform": {"dated": 0.7, "past_min": 7 * 24 * 60, "future_min": 30 * 24 * 60, "burst": 0.0},
+    # Beaucoup de retard : 90 % datées, surtout dans le passé
+    "backlog": {"dated": 0.9, "past_min": 90 * 24 * 60, "future_min": 7 * 24 * 60, "burst": 0.0},
+    # 20 % des tâches datées tombent dans la même minute (rafale de rappels)
+    "burst": {"dated": 0.7, "past_min": 7 * 24 * 60, "future_min": 30 * 24 * 60, "burst": 0.2},
+}
+
+def group_names(group_count):
+    """Groupes par défaut de schema.sql, complétés par 'Groupe-N' si besoin."""
+    defaults = ["Default", "Root", "Dev", "Perso"]
+    return (defaults + [f"Groupe-{i}" for i in range(len(defaults), group_count)])[:group_count]
+
+def tag_names(tag_count):
+    """tag_count tags distincts (mots du vocabulaire, puis 'tag-N')."""
+    return (WORDS + [f"tag-{i}" for i in range(len(WORDS), tag_count)])[:tag_count]
+
+# Colonnes des tuples de fake_tasks (dans l'ordre)
+TASK_FIELDS = ["title", "description", "group_name", "priority", "tags", "due_date", "status",
+               "created_at", "completed_at"]
+HISTORY_DAYS = 120  # Ancienneté max des tâches générées (au-delà du seuil d'archivage par défaut)
+
+def fake_tasks(n, seed=42, now=None, tag_count=12, group_count=4, due_profile="uniform",
+               done_ratio=0.2):
+    """Génère n tâches synthétiques (tuples dans l'ordre de TASK_FIELDS).
+
+    tag_count / group_count : cardinalités ; due_profile : clé de DUE_PROFILES.
+    Les rafales ("burst") tombent à now + 1 min. Les tâches terminées ont un
+    completed_at réparti sur HISTORY_DAYS jours (rapport hebdo, archivage).
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    groups = group_names(group_count)
+    tags = tag_names(tag_count)
+    profile = DUE_PROFILES[due_profile]
+    burst_at = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    for _ in range(n):
+        due = None
+        if rng.random() < profile["dated"]:
+            if profile["burst"] and rng.random() < profile["burst"]:
+                due = burst_at
+            else:
+                due = now + timedelta(minutes=rng.randint(-profile["past_min"], profile["future_min"]))
+        title = " ".join(rng.choices(WORDS, k=rng.randint(2, 5))).capitalize()
+        description = " ".join(rng.choices(WORDS, k=rng.randint(0, 20)))
+        group = rng.choice(groups)
+        priority = rng.choice((1, 2, 3))
+        task_tags = rng.sample(tags, k=min(len(tags), rng.randint(0, 3)))
+        status = 'pending' if rng.random() < 1 - done_ratio else 'done'
+        created_at = now - timedelta(minutes=rng.randint(0, HISTORY_DAYS * 24 * 60))
+        completed_at = None
+        if status == 'done':
+            completed_at = created_at + (now - created_at) * rng.random()
+        yield (title, description, group, priority, task_tags, due, status, created_at, completed_at)
+
+def seed_tasks(n, seed=42, **profile):
+    """Insère n tâches synthétiques (et leurs groupes) dans le schéma de bench."""
+    conn = connect_dedicated()
+    with conn.cursor() as cur:
+        execute_values(cur, "INSERT INTO task_groups (name) VALUES %s ON CONFLICT DO NOTHING",
+                       [(g,) for g in group_names(profile.get("group_count", 4))])
+        execute_values(cur, f"""
+            INSERT INTO tasks ({", ".join(TASK_FIELDS)})
+            VALUES %s
+        """, fake_tasks(n, seed, **profile), page_size=1000)
+        cur.execute("ANALYZE tasks")
+    conn.commit()
+    conn.close()
+
+def fake_render(title, group, due_str):
+    """Rendu simulé d'une carte (Streamlit n'est pas exécutable hors serveur)."""
+    return f"{title}|{group}|{due_str or ''}"
+
+def render_list_view(now, page_size=50, status='pending'):
+    """Chemin de la vue "Liste" d'app.py, sans Streamlit : comptage par section, puis
+    première page de chaque section non vide (count_tasks -> query_tasks -> classify_tasks).
+    Retourne le nombre de cartes préparées."""
+    from database.db import count_tasks, query_tasks
+    from modules.views import classify_tasks
+    cards = 0
+    for bucket, n in count_tasks(by='bucket', status=status, now=now).items():
+        if not n:
+            continue
+        tasks, _ = query_tasks(status=status, bucket=bucket, now=now, limit=page_size)
+        for card in classify_tasks(tasks, now):
+            fake_render(card.title, card.group_name, card.due_str)
+            cards += 1
+    return cards
+
+def bench(fn, repeat=5, setup=None):
+    """Chronomètre fn() `repeat` fois. Retourne {'min', 'median', 'max'} en millisecondes.
+
+    setup() (non chronométré) est appelé avant chaque mesure.
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"min": min(timings), "median": statistics.median(timings), "max": max(timings)}
+
+def report(label, stats):
+    print(f"{label:<45} min {stats['min']:9.2f} ms | médiane {stats['median']:9.2f} ms | max {stats['max']:9.2f} ms")
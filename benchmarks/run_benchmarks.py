@@ -0,0 +1,210 @@
+"""Suite de benchmarks des chemins chauds, avec résultats JSON comparables entre exécutions.
+
+Usage :
+  python benchmarks/run_benchmarks.py --tasks 50000 --tags 40 --groups 8 --due-profile burst \\
+      --output results/apres.json --compare results/avant.json
+
+Nécessite une base Postgres accessible via les variables DB_* (.env). Une
+instance jetable suffit, par exemple :
+  docker run --rm -d -p 5432:5432 -e POSTGRES_PASSWORD=bench -e POSTGRES_DB=app_db postgres:16
+Tout se passe dans le schéma de bench (voir common.py). Telegram est remplacé
+par un serveur bouchon local (telegram_stub.py), l'API réelle n'est jamais appelée.
+
+Mesures : lecture historique (get_tasks), filtres + tri + rendu de l'UI,
+facettes, tick du scheduler (rechargement + rafale de rappels), livraison
+Telegram, rapport hebdo, écritures groupées.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from common import (DUE_PROFILES, ROOT_DIR, TASK_FIELDS, bench, fake_tasks, render_list_view,
+                    report, reset_schema, seed_tasks, tag_names)
+from telegram_stub import TelegramStub
+
+STUB_CHATS = "1001,1002"
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(args, stub):
+    # Imports après le démarrage du bouchon : notifications lit TELEGRAM_API_URL à l'import
+    from database.db import (get_tasks, query_tasks, count_tasks, search_tasks, add_tasks,
+                             mark_done_many, delete_many, get_cursor)
+    from database.facets import get_facets
+    from modules.ledger import AlertLedger
+    from modules.notifications import get_dispatcher
+    from modules.reminders import ReminderEngine
+    from modules.report import build_weekly_report
+
+    results = {}
+
+    def measure(name, fn, setup=None, repeat=args.repeat):
+        results[name] = bench(fn, repeat, setup)
+        report(name, results[name])
+
+    now = datetime.now()
+    tag = tag_names(args.tags)[0]
+
+    # --- Lectures de l'UI ---
+    measure("get_tasks (table entière, sans cache)", lambda: get_tasks.uncached(status='pending'))
+    measure("query_tasks (page, tri smart)", lambda: query_tasks(status='pending', limit=50))
+    measure("query_tasks (tag + priorité)",
+            lambda: query_tasks(status='pending', tags=[tag], priorities=[3], limit=50))
+    measure("query_tasks (recherche)", lambda: query_tasks(status='pending', search="backup", limit=50))
+    measure("search_tasks (top 20)", lambda: search_tasks("backup postgres"))
+    measure("count_tasks (par section)", lambda: count_tasks(by='bucket', status='pending', now=now))
+    measure("rendu vue Liste (count -> pages -> cartes)", lambda: render_list_view(now))
+    measure("facettes (sans cache)", lambda: get_facets.uncached('pending'))
+
+    # --- Scheduler ---
+    fire_at = now.replace(second=0, microsecond=0) + timedelta(minutes=1)  # Rafale du profil "burst"
+
+    def fresh_engine():
+        with get_cursor() as cur:
+            cur.execute("TRUNCATE sent_alerts")
+        engine = ReminderEngine(reminder_minutes=5, ledger=AlertLedger())
+        state["engine"] = engine
+
+    state = {}
+    measure("scheduler : rechargement de la fenêtre",
+            lambda: state["engine"].reload(fire_at), setup=fresh_engine)
+    measure("scheduler : tick (alertes à l'instant T)",
+            lambda: state["engine"].run_pending(fire_at), setup=fresh_engine)
+
+    # Livraison d'un tick complet au bouchon Telegram (file + workers + HTTP)
+    dispatcher = get_dispatcher()
+    dispatcher.flush(timeout=60)
+    before = stub.count()
+    fresh_engine()
+    start = time.perf_counter()
+    alerts = state["engine"].run_pending(fire_at)
+    dispatcher.flush(timeout=120)
+    elapsed = (time.perf_counter() - start) * 1000
+    results["telegram : livraison d'un tick"] = {
+        "min": elapsed, "median": elapsed, "max": elapsed,
+        "alerts": alerts, "messages": stub.count() - before,
+    }
+    report("telegram : livraison d'un tick", results["telegram : livraison d'un tick"])
+
+    # --- Rapport hebdo ---
+    measure("rapport hebdo (agrégats SQL)", lambda: build_weekly_report(now))
+
+    # --- Écritures groupées (chaque mesure crée puis retire son propre lot) ---
+    batch = [dict(zip(TASK_FIELDS, row)) for row in fake_tasks(args.batch, seed=7, tag_count=args.tags,
+                                                          group_count=args.groups)]
+    marker = "bench-batch"
+    for task in batch:
+        task["description"] = marker
+
+    def batch_ids():
+        with get_cursor() as cur:
+            cur.execute("SELECT id FROM tasks WHERE description = %s", (marker,))
+            return [row[0] for row in cur.fetchall()]
+
+    def reset_batch(insert=True):
+        delete_many(batch_ids())
+        if insert:
+            add_tasks(batch)
+            state["ids"] = batch_ids()
+
+    measure(f"bulk : add_tasks ({args.batch})", lambda: add_tasks(batch),
+            setup=lambda: reset_batch(insert=False))
+    measure(f"bulk : mark_done_many ({args.batch})", lambda: mark_done_many(state["ids"]), setup=reset_batch)
+    measure(f"bulk : delete_many ({args.batch})", lambda: delete_many(state["ids"]), setup=reset_batch)
+    reset_batch(insert=False)
+    return results
+
+def server_version():
+    from database.db import get_cursor
+    with get_cursor() as cur:
+        cur.execute("SHOW server_version")
+        return cur.fetchone()[0]
+
+def compare(results, baseline_path, threshold):
+    """Affiche l'écart des médianes avec une exécution précédente. Retourne les régressions."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    print(f"\n=== Comparaison avec {baseline_path} (médianes) ===")
+    for name, stats in results.items():
+        if name not in baseline:
+            print(f"{name:<45} (nouveau)")
+            continue
+        old, new = baseline[name]["median"], stats["median"]
+        delta = (new - old) / old if old else 0.0
+        flag = ""
+        if delta > threshold:
+            flag = " ⚠️ RÉGRESSION"
+            regressions.append(name)
+        elif delta < -threshold:
+            flag = " ✅"
+        print(f"{name:<45} {old:9.2f} -> {new:9.2f} ms ({delta:+.0%}){flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10_000, help="Nombre de tâches générées")
+    parser.add_argument("--tags", type=int, default=12, help="Nombre de tags distincts")
+    parser.add_argument("--groups", type=int, default=4, help="Nombre de groupes")
+    parser.add_argument("--due-profile", choices=sorted(DUE_PROFILES), default="burst",
+                        help="Répartition des échéances")
+    parser.add_argument("--done-ratio", type=float, default=0.2, help="Part de tâches terminées")
+    parser.add_argument("--batch", type=int, default=1000, help="Taille des lots d'écriture groupée")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Fichier JSON de résultats")
+    parser.add_argument("--compare", help="Résultats JSON d'une exécution précédente")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Écart de médiane signalé comme régression (0.2 = +20 %%)")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Code de sortie 1 si une régression est détectée")
+    args = parser.parse_args()
+
+    profile = {"tag_count": args.tags, "group_count": args.groups,
+               "due_profile": args.due_profile, "done_ratio": args.done_ratio}
+
+    with TelegramStub() as stub:
+        os.environ["TELEGRAM_API_URL"] = stub.url
+        os.environ["TELEGRAM_HOMELAB_TOKEN"] = "bench"
+        os.environ["TELEGRAM_CHAT_IDS"] = STUB_CHATS
+
+        reset_schema()
+        start = time.perf_counter()
+        seed_tasks(args.tasks, args.seed, **profile)
+        print(f"🌱 {args.tasks} tâches générées en {time.perf_counter() - start:.1f}s "
+              f"(profil {args.due_profile}, {args.tags} tags, {args.groups} groupes)\n")
+        results = run_suite(args, stub)
+
+    output = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "postgres": server_version(),
+            "profile": dict(profile, tasks=args.tasks, batch=args.batch, repeat=args.repeat, seed=args.seed),
+        },
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Résultats écrits dans {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ==============================================================================
+# SERVEUR TELEGRAM BOUCHON (benchmarks)
+# ==============================================================================
+# Répond {"ok": true} à tout POST /bot<token>/sendMessage et compte les messages.
+# Le dispatcher y est redirigé via TELEGRAM_API_URL (voir modules/notifications.py) :
+# les benchmarks exercent tout le chemin d'envoi sans toucher à l'API réelle.
+
+class TelegramStub:
+    """Serveur HTTP local en thread démon. Usage : with TelegramStub() as stub: ..."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.latency = latency  # Délai de réponse simulé (s)
+        self.messages = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub._lock:
+                    stub.messages.append(json.loads(body or b"{}"))
+                if stub.latency:
+                    threading.Event().wait(stub.latency)
+                payload = b'{"ok": true, "result": {}}'
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass  # Silencieux : un log par requête fausserait les mesures
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://{host}:{self._server.server_address[1]}"
+
+    def count(self):
+        with self._lock:
+            return len(self.messages)
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="telegram-stub", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+
+# ==============================================================================
+# CACHE MÉMOIRE À EXPIRATION (Partagé entre sessions Streamlit et threads)
+# ==============================================================================
+# Chaque entrée expire après `ttl` secondes ; au-delà de `max_size` entrées, la
+# moins récemment utilisée est évincée (LRU). Une entrée peut déclarer les
+# tables dont elle dépend : invalidate_tables('tasks') n'oublie que celles-là.
+
+class TTLCache:
+    """Mémoïsation clé -> valeur, expirée après `ttl` secondes, LRU ou par invalidation."""
+
+    def __init__(self, ttl=60, max_size=None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data = OrderedDict()  # key -> (expires_at, tables, value), du plus ancien au plus récent
+        self._generation = 0        # Incrémenté à chaque invalidation totale
+        self._table_generations = {}  # table -> générations (invalidations ciblées)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0,
+                       "invalidations": 0, "stale_loads": 0}
+
+    def _snapshot(self, tables):
+        return self._generation, tuple(self._table_generations.get(t, 0) for t in tables)
+
+    def get_or_load(self, key, loader, tables=(), ttl=None):
+        """Retourne la valeur en cache, ou l'obtient via loader() puis la mémorise.
+
+        `tables` : tables lues par loader(), pour une invalidation ciblée ;
+        `ttl` : durée de vie propre à cette entrée (sinon self.ttl).
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._data.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry[2]
+                del self._data[key]
+                self._stats["expirations"] += 1
+            self._stats["misses"] += 1
+            snapshot = self._snapshot(tables)
+        # Chargement hors verrou : une requête lente ne bloque pas les autres clés
+        value = loader()
+        with self._lock:
+            # Une écriture survenue pendant le chargement rend la valeur douteuse :
+            # on la renvoie sans la mémoriser.
+            if snapshot != self._snapshot(tables):
+                self._stats["stale_loads"] += 1
+                return value
+            self._data[key] = (time.monotonic() + (ttl or self.ttl), tuple(tables), value)
+            self._data.move_to_end(key)
+            if self.max_size is not None:
+                while len(self._data) > self.max_size:
+                    self._data.popitem(last=False)
+                    self._stats["evictions"] += 1
+        return value
+
+    def invalidate(self, key=None):
+        """Oublie une clé, ou tout le cache si key est None."""
+        with self._lock:
+            self._stats["invalidations"] += 1
+            self._generation += 1
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def invalidate_tables(self, *tables):
+        """Oublie uniquement les entrées qui dépendent d'une de ces tables."""
+        with self._lock:
+            self._stats["invalidations"] += 1
+            for table in tables:
+                self._table_generations[table] = self._table_generations.get(table, 0) + 1
+            stale = [k for k, entry in self._data.items() if not set(tables).isdisjoint(entry[1])]
+            for k in stale:
+                del self._data[k]
+
+    def stats(self):
+        """Compteurs (hits, misses, evictions...) + taille et taux de succès."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._data)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
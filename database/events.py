@@ -0,0 +1,45 @@
+import logging
+import threading
+from collections import namedtuple
+
+# ==============================================================================
+# BUS D'ÉVÉNEMENTS (Changements de données, in-process)
+# ==============================================================================
+# Les helpers d'écriture de database/db.py publient ici chaque modification ;
+# les consommateurs (scheduler, caches...) s'abonnent pour réagir sans polling.
+# Le listener Postgres (database/listener.py) y relaie aussi les NOTIFY, donc les
+# écritures des autres processus. Une écriture locale arrive ainsi deux fois
+# (synchrone, puis via NOTIFY) : les événements sont de simples signaux
+# d'invalidation, les abonnés doivent être idempotents.
+# Format : ChangeEvent(table='tasks', op='INSERT'|'UPDATE'|'DELETE', id=42)
+# id=None : écriture en masse (plusieurs lignes, un seul événement par instruction).
+# table='*' / op='RESYNC' : des changements ont pu être manqués, tout relire.
+
+ChangeEvent = namedtuple("ChangeEvent", ["table", "op", "id"])
+
+log = logging.getLogger(__name__)
+
+_subscribers = []
+_lock = threading.Lock()
+
+def subscribe(callback):
+    """Abonne `callback(event)` aux changements. Retourne la fonction de désabonnement."""
+    with _lock:
+        _subscribers.append(callback)
+
+    def unsubscribe():
+        with _lock:
+            if callback in _subscribers:
+                _subscribers.remove(callback)
+    return unsubscribe
+
+def publish(table, op, row_id=None):
+    """Diffuse un changement à tous les abonnés (une erreur d'abonné n'arrête pas les autres)."""
+    event = ChangeEvent(table, op, row_id)
+    with _lock:
+        callbacks = list(_subscribers)
+    for callback in callbacks:
+        try:
+            callback(event)
+        except Exception:
+            log.exception("❌ Erreur abonné événement", extra={"table": table, "op": op})
@@ -0,0 +1,37 @@
+from database.db import get_cursor, cached_query
+from modules.observability import instrument_query
+
+# ==============================================================================
+# FACETTES (Tags & Groupes avec compteurs)
+# ==============================================================================
+# Agrégats calculés par Postgres (unnest / GROUP BY) puis mémorisés dans le cache
+# partagé des lectures (database.db.query_cache) : la sidebar et les filtres les
+# relisent à chaque rerun sans toucher la base. Toute écriture sur tasks /
+# task_groups les invalide, le TTL (plus long que celui par défaut) n'étant
+# qu'un filet de sécurité.
+FACET_TTL = 300
+
+@cached_query('tasks', 'task_groups', ttl=FACET_TTL)
+@instrument_query
+def get_facets(status=None):
+    """{'tags': [(tag, nb), ...], 'groups': [(groupe, nb), ...]} pour le statut donné."""
+    status_filter = "AND t.status = %(status)s" if status else ""
+    with get_cursor() as cur:
+        cur.execute(f"""
+            SELECT tag, COUNT(*) FROM tasks t, unnest(t.tags) AS tag
+            WHERE TRUE {status_filter}
+            GROUP BY tag ORDER BY tag
+        """, {'status': status})
+        tags = cur.fetchall()
+        cur.execute(f"""
+            SELECT g.name, COUNT(t.id)
+            FROM task_groups g
+            LEFT JOIN tasks t ON t.group_name = g.name {status_filter}
+            GROUP BY g.name ORDER BY g.name
+        """, {'status': status})
+        groups = cur.fetchall()
+    return {'tags': tags, 'groups': groups}
+
+def get_group_names():
+    """Noms des groupes (triés), depuis le cache des facettes."""
+    return [name for name, _ in get_facets()['groups']]
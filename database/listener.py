@@ -0,0 +1,90 @@
+import json
+import logging
+import select
+import threading
+from database.db import connect_dedicated
+from database.events import publish
+
+# ==============================================================================
+# LISTENER POSTGRES (LISTEN/NOTIFY -> bus d'événements)
+# ==============================================================================
+# Les triggers de schema.sql émettent un NOTIFY 'polytask_changes' à chaque
+# écriture sur tasks / task_groups. Ce thread écoute le canal sur une connexion
+# dédiée et rediffuse chaque changement aux abonnés de database.events, y compris
+# ceux provoqués par un autre processus (autre conteneur, psql...).
+
+CHANNEL = "polytask_changes"
+
+log = logging.getLogger(__name__)
+
+class ChangeListener(threading.Thread):
+    """Thread démon qui relaie les NOTIFY Postgres vers database.events."""
+
+    def __init__(self, channel=CHANNEL, poll_timeout=30, max_backoff=60):
+        super().__init__(name="polytask-listener", daemon=True)
+        self.channel = channel
+        self.poll_timeout = poll_timeout
+        self.max_backoff = max_backoff
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        backoff = 1
+        while not self._stop_event.is_set():
+            conn = None
+            try:
+                conn = connect_dedicated()
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {self.channel};")
+                # Des changements ont pu être manqués pendant la déconnexion :
+                # un événement générique force les abonnés à se resynchroniser.
+                publish('*', 'RESYNC')
+                log.info("👂 Listener Postgres actif sur '%s'", self.channel)
+                backoff = 1
+                self._listen(conn)
+            except Exception as e:
+                log.error("❌ Listener Postgres: %s (nouvel essai dans %ss)", e, backoff)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            self._stop_event.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _listen(self, conn):
+        while not self._stop_event.is_set():
+            # select() rend la main dès qu'un NOTIFY arrive (ou au timeout)
+            if select.select([conn], [], [], self.poll_timeout) == ([], [], []):
+                continue
+            conn.poll()
+            while conn.notifies:
+                self._dispatch(conn.notifies.pop(0).payload)
+
+    @staticmethod
+    def _dispatch(payload):
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            log.warning("⚠️ Payload NOTIFY illisible : %r", payload)
+            return
+        row_id = data.get('id')
+        if data.get('table') == 'tasks' and row_id is not None:
+            row_id = int(row_id)
+        publish(data.get('table'), data.get('op'), row_id)
+
+_listener = None
+_listener_lock = threading.Lock()
+
+def start_listener():
+    """Démarre (une seule fois par processus) le listener et le retourne."""
+    global _listener
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = ChangeListener()
+            _listener.start()
+    return _listener
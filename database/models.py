@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+# ==============================================================================
+# ENREGISTREMENTS TYPÉS (Lignes SQL -> tuples nommés, sans Pandas)
+# ==============================================================================
+# Les chemins non analytiques (UI, scheduler) manipulent des tuples nommés :
+# pas de __dict__ par ligne, accès par attribut, dates Python natives telles que
+# renvoyées par psycopg2. L'ordre des champs est l'ordre des colonnes du SELECT
+# (voir columns() et les row factories de database/db.py).
+
+class Task(NamedTuple):
+    """Une ligne de la table tasks (hors search_vector)."""
+    id: int
+    title: str
+    description: Optional[str]
+    group_name: Optional[str]
+    priority: int
+    tags: list
+    due_date: Optional[datetime]
+    status: str
+    created_at: Optional[datetime]
+    completed_at: Optional[datetime]
+    series_id: Optional[int]
+
+class Deadline(NamedTuple):
+    """Échéance à surveiller : uniquement ce dont le scheduler a besoin."""
+    id: int
+    title: str
+    due_date: datetime
+    priority: int
+    group_name: Optional[str]
+    created_at: Optional[datetime] = None
+
+def columns(record_type):
+    """Liste SQL des colonnes d'un enregistrement ("id, title, ...")."""
+    return ", ".join(record_type._fields)
@@ -11,10 +11,291 @@ CREATE TABLE IF NOT EXISTS tasks (
     completed_at TIMESTAMP
 );
 
+-- Recherche / filtres côté serveur (trigrammes pour ILIKE, GIN pour tags && ...)
+CREATE INDEX IF NOT EXISTS idx_tasks_tags ON tasks USING GIN (tags);
+CREATE INDEX IF NOT EXISTS idx_tasks_status_id ON tasks (status, id DESC);
+
+-- pg_trgm est une extension "contrib" : si elle manque, on continue sans ces
+-- index (ILIKE reste correct, juste séquentiel) plutôt que d'annuler tout le schéma.
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX IF NOT EXISTS idx_tasks_title_trgm ON tasks USING GIN (title gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS idx_tasks_description_trgm ON tasks USING GIN (description gin_trgm_ops);
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'pg_trgm indisponible, index trigrammes ignorés : %', SQLERRM;
+END
+$$;
+
+-- Recherche plein texte : vecteur généré (titre > description > tags) + index GIN.
+-- array_to_tsvector refuse les éléments NULL ou vides : ils sont retirés avant.
+-- Un vecteur créé sans ce filtre (versions antérieures) est supprimé puis recréé.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_schema = current_schema() AND table_name = 'tasks'
+                 AND column_name = 'search_vector'
+                 AND generation_expression NOT LIKE '%array_remove%') THEN
+        ALTER TABLE tasks DROP COLUMN search_vector;
+    END IF;
+END
+$$;
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('french', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('french', coalesce(description, '')), 'B') ||
+        setweight(array_to_tsvector(array_remove(array_remove(coalesce(tags, '{}'), ''), NULL)), 'C')
+    ) STORED;
+CREATE INDEX IF NOT EXISTS idx_tasks_search ON tasks USING GIN (search_vector);
+
+-- Index partiel pour le scheduler : seules les tâches en attente avec échéance
+CREATE INDEX IF NOT EXISTS idx_tasks_pending_due ON tasks (due_date) WHERE status = 'pending';
+
 -- Table pour gérer les groupes dynamiquement
 CREATE TABLE IF NOT EXISTS task_groups (
     name VARCHAR(50) PRIMARY KEY
 );
 
 -- On insère les groupes par défaut si la table est vide
-INSERT INTO task_groups (name) VALUES ('Default'), ('Root'), ('Dev'), ('Perso') ON CONFLICT DO NOTHING;
\ No newline at end of file
+INSERT INTO task_groups (name) VALUES ('Default'), ('Root'), ('Dev'), ('Perso') ON CONFLICT DO NOTHING;
+
+-- Tâches récurrentes : la règle est stockée une fois par série (à la RRULE :
+-- fréquence, intervalle, fin par date et/ou nombre d'occurrences). Une série n'a
+-- jamais plus d'UNE occurrence en attente dans tasks : la suivante est créée
+-- quand celle-ci est terminée ou supprimée (trigger ci-dessous).
+CREATE TABLE IF NOT EXISTS task_series (
+    id SERIAL PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    group_name VARCHAR(50),
+    priority INT DEFAULT 2,
+    tags TEXT[],
+    freq VARCHAR(10) NOT NULL CHECK (freq IN ('daily', 'weekly', 'monthly')),
+    every INT NOT NULL DEFAULT 1 CHECK (every >= 1),
+    dtstart TIMESTAMP NOT NULL,
+    until_at TIMESTAMP,
+    max_count INT CHECK (max_count >= 1),
+    active BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS series_id INT REFERENCES task_series (id) ON DELETE SET NULL;
+-- Une occurrence donnée d'une série n'est matérialisée qu'une fois (UI et scheduler concurrents)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_series_due ON tasks (series_id, due_date) WHERE series_id IS NOT NULL;
+
+-- n-ième pas d'une série (les mois sont comptés depuis dtstart : pas de dérive 31 -> 28 -> 28)
+CREATE OR REPLACE FUNCTION polytask_series_step(p_freq TEXT, p_steps INT) RETURNS INTERVAL AS $$
+    SELECT CASE p_freq
+        WHEN 'daily' THEN make_interval(days => p_steps)
+        WHEN 'weekly' THEN make_interval(weeks => p_steps)
+        ELSE make_interval(months => p_steps)
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Première occurrence d'une série strictement après p_after (NULL : série finie / arrêtée)
+CREATE OR REPLACE FUNCTION polytask_series_next(p_series INT, p_after TIMESTAMP) RETURNS TIMESTAMP AS $$
+DECLARE
+    s task_series%ROWTYPE;
+    n INT;
+    due TIMESTAMP;
+BEGIN
+    SELECT * INTO s FROM task_series WHERE id = p_series;
+    IF NOT FOUND OR NOT s.active THEN
+        RETURN NULL;
+    END IF;
+    -- Estimation directe de l'index, puis ajustement : pas de parcours depuis dtstart
+    IF p_after < s.dtstart THEN
+        n := 0;
+    ELSIF s.freq = 'monthly' THEN
+        n := floor((extract(year FROM age(p_after, s.dtstart)) * 12
+                    + extract(month FROM age(p_after, s.dtstart))) / s.every)::INT;
+    ELSE
+        n := floor(extract(epoch FROM p_after - s.dtstart)
+                   / extract(epoch FROM polytask_series_step(s.freq, s.every)))::INT;
+    END IF;
+    LOOP
+        due := s.dtstart + polytask_series_step(s.freq, n * s.every);
+        EXIT WHEN due > p_after;
+        n := n + 1;
+    END LOOP;
+    IF (s.max_count IS NOT NULL AND n >= s.max_count) OR (s.until_at IS NOT NULL AND due > s.until_at) THEN
+        RETURN NULL;
+    END IF;
+    RETURN due;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- "Maintenant" de l'application : les dates sont des TIMESTAMP sans fuseau, à l'heure
+-- locale des conteneurs de l'app (TZ), pas à celle du serveur Postgres. Les écritures
+-- de database/db.py le fixent pour leur transaction (SET LOCAL polytask.now) ; à défaut
+-- (psql, script externe), l'horloge de la base est utilisée.
+CREATE OR REPLACE FUNCTION polytask_now() RETURNS TIMESTAMP AS $$
+    SELECT COALESCE(NULLIF(current_setting('polytask.now', TRUE), '')::TIMESTAMP, LOCALTIMESTAMP);
+$$ LANGUAGE sql STABLE;
+
+-- Crée l'occurrence suivant p_after si la série n'en a aucune en attente. Retourne son id (ou NULL).
+CREATE OR REPLACE FUNCTION polytask_series_materialize(p_series INT, p_after TIMESTAMP) RETURNS INT AS $$
+DECLARE
+    due TIMESTAMP;
+    new_id INT;
+BEGIN
+    IF EXISTS (SELECT 1 FROM tasks WHERE series_id = p_series AND status = 'pending') THEN
+        RETURN NULL;
+    END IF;
+    due := polytask_series_next(p_series, p_after);
+    IF due IS NULL THEN
+        RETURN NULL;
+    END IF;
+    INSERT INTO tasks (title, description, group_name, priority, tags, due_date, status, series_id, created_at)
+    SELECT title, description, group_name, priority, tags, due, 'pending', id, polytask_now()
+    FROM task_series WHERE id = p_series
+    ON CONFLICT DO NOTHING
+    RETURNING id INTO new_id;
+    RETURN new_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Occurrence terminée ou supprimée -> la suivante (après maintenant : les
+-- occurrences manquées ne sont pas rattrapées une à une)
+CREATE OR REPLACE FUNCTION polytask_series_advance() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW.status <> 'done' THEN
+        RETURN NULL;
+    END IF;
+    PERFORM polytask_series_materialize(OLD.series_id, GREATEST(OLD.due_date, polytask_now()));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tasks_series_advance ON tasks;
+CREATE TRIGGER tasks_series_advance
+    AFTER UPDATE OF status OR DELETE ON tasks
+    FOR EACH ROW WHEN (OLD.series_id IS NOT NULL AND OLD.status = 'pending')
+    EXECUTE FUNCTION polytask_series_advance();
+
+-- Registre des alertes envoyées (anti-doublon persistant, survit aux redémarrages)
+CREATE TABLE IF NOT EXISTS sent_alerts (
+    task_id INT NOT NULL,
+    kind VARCHAR(16) NOT NULL,
+    due_date TIMESTAMP NOT NULL,
+    sent_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (task_id, kind, due_date)
+);
+CREATE INDEX IF NOT EXISTS idx_sent_alerts_sent_at ON sent_alerts (sent_at);
+
+-- Historique froid : les tâches terminées depuis plus de `archive_after_days`
+-- (config.yaml) y sont déplacées par paquets (job d'archivage du scheduler).
+-- tasks ne contient plus que le backlog vivant et l'historique récent : son coût
+-- suit le travail en cours, pas le volume cumulé. Les ids sont conservés.
+CREATE TABLE IF NOT EXISTS tasks_archive (
+    id INT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    group_name VARCHAR(50),
+    priority INT,
+    tags TEXT[],
+    due_date TIMESTAMP,
+    status VARCHAR(20),
+    created_at TIMESTAMP,
+    completed_at TIMESTAMP,
+    series_id INT,  -- Sans clé étrangère : la série peut disparaître, l'historique reste
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Même vecteur que tasks : les filtres de recherche s'appliquent tels quels
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_schema = current_schema() AND table_name = 'tasks_archive'
+                 AND column_name = 'search_vector'
+                 AND generation_expression NOT LIKE '%array_remove%') THEN
+        ALTER TABLE tasks_archive DROP COLUMN search_vector;
+    END IF;
+END
+$$;
+ALTER TABLE tasks_archive ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('french', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('french', coalesce(description, '')), 'B') ||
+        setweight(array_to_tsvector(array_remove(array_remove(coalesce(tags, '{}'), ''), NULL)), 'C')
+    ) STORED;
+
+-- Candidats à l'archivage, du plus ancien au plus récent
+CREATE INDEX IF NOT EXISTS idx_tasks_done_completed ON tasks (completed_at) WHERE status = 'done';
+
+-- Flux de changements : chaque instruction qui écrit dans tasks / task_groups / task_series
+-- émet un seul NOTIFY sur le canal 'polytask_changes' (payload JSON : table, op, id).
+-- Triggers par instruction (tables de transition) : un UPDATE/DELETE en masse donne une
+-- notification, pas une par ligne. id n'est renseigné que si une seule ligne a changé
+-- (tasks / task_series : id, task_groups : name), sinon null (= "plusieurs lignes").
+CREATE OR REPLACE FUNCTION polytask_notify_change() RETURNS trigger AS $$
+DECLARE
+    n_rows INTEGER;
+    row_id TEXT;
+BEGIN
+    SELECT COUNT(*), MIN(to_jsonb(changed) ->> TG_ARGV[0]) INTO n_rows, row_id FROM changed;
+    IF n_rows = 0 THEN
+        RETURN NULL;
+    END IF;
+    PERFORM pg_notify('polytask_changes',
+        json_build_object('table', TG_TABLE_NAME, 'op', TG_OP,
+                          'id', CASE WHEN n_rows = 1 THEN row_id END)::TEXT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Une table de transition n'est possible que sur un trigger à un seul événement :
+-- trois triggers par table. Les anciens triggers par ligne sont supprimés.
+DO $$
+DECLARE
+    tbl TEXT;
+    ev TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY['tasks', 'task_groups', 'task_series'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tbl || '_notify_change', tbl);
+        FOREACH ev IN ARRAY ARRAY['insert', 'update', 'delete'] LOOP
+            EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tbl || '_notify_' || ev, tbl);
+            EXECUTE format(
+                'CREATE TRIGGER %I AFTER %s ON %I REFERENCING %s TABLE AS changed '
+                'FOR EACH STATEMENT EXECUTE FUNCTION polytask_notify_change(%L)',
+                tbl || '_notify_' || ev, upper(ev), tbl,
+                CASE WHEN ev = 'delete' THEN 'OLD' ELSE 'NEW' END,
+                CASE WHEN tbl = 'task_groups' THEN 'name' ELSE 'id' END);
+        END LOOP;
+    END LOOP;
+END $$;
+
+-- Version des données : incrémentée une fois par instruction modifiant tasks /
+-- task_groups / task_series / tasks_archive. L'UI la compare (requête triviale) avant de relire quoi que ce soit.
+CREATE TABLE IF NOT EXISTS data_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO data_version (id, version) VALUES (TRUE, 0) ON CONFLICT DO NOTHING;
+
+CREATE OR REPLACE FUNCTION polytask_bump_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE data_version SET version = version + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tasks_bump_version ON tasks;
+CREATE TRIGGER tasks_bump_version
+    AFTER INSERT OR UPDATE OR DELETE ON tasks
+    FOR EACH STATEMENT EXECUTE FUNCTION polytask_bump_version();
+
+DROP TRIGGER IF EXISTS task_groups_bump_version ON task_groups;
+CREATE TRIGGER task_groups_bump_version
+    AFTER INSERT OR UPDATE OR DELETE ON task_groups
+    FOR EACH STATEMENT EXECUTE FUNCTION polytask_bump_version();
+
+DROP TRIGGER IF EXISTS task_series_bump_version ON task_series;
+CREATE TRIGGER task_series_bump_version
+    AFTER INSERT OR UPDATE OR DELETE ON task_series
+    FOR EACH STATEMENT EXECUTE FUNCTION polytask_bump_version();
+
+DROP TRIGGER IF EXISTS tasks_archive_bump_version ON tasks_archive;
+CREATE TRIGGER tasks_archive_bump_version
+    AFTER INSERT OR UPDATE OR DELETE ON tasks_archive
+    FOR EACH STATEMENT EXECUTE FUNCTION polytask_bump_version();
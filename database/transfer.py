@@ -0,0 +1,135 @@
+import argparse
+import csv
+import json
+import sys
+from datetime import datetime
+from database.db import get_connection, add_tasks, ARCHIVE_TABLE, BULK_PAGE_SIZE
+
+# ==============================================================================
+# IMPORT / EXPORT DES TÂCHES (CSV ou JSON Lines, en flux)
+# ==============================================================================
+# Export : curseur serveur Postgres (named cursor), lu par paquets de
+# BULK_PAGE_SIZE lignes. Import : lecture ligne à ligne du fichier, insérée par
+# paquets via add_tasks (execute_values). Ni l'un ni l'autre ne charge le
+# fichier ou la table entière en mémoire.
+#
+# Usage :
+#   python -m database.transfer export taches.csv [--status pending]
+#   python -m database.transfer import taches.jsonl
+#   ('-' = stdout / stdin ; format déduit de l'extension, sinon --format)
+
+EXPORT_FIELDS = ["id", "title", "description", "group_name", "priority", "tags",
+                 "due_date", "status", "created_at", "completed_at"]
+IMPORT_FIELDS = ["title", "description", "group_name", "priority", "tags", "due_date", "status",
+                 "created_at", "completed_at"]
+DATE_FIELDS = ("due_date", "created_at", "completed_at")
+FORMATS = ("csv", "json")
+TAG_SEP = ","  # Tags d'une tâche dans une cellule CSV ("dev,urgent")
+
+def iter_tasks(status=None, chunk_size=BULK_PAGE_SIZE):
+    """Génère les tâches (dicts, archives comprises) via un curseur serveur, chunk_size lignes à la fois."""
+    conn = get_connection()
+    try:
+        with conn.cursor(name="polytask_export") as cur:
+            cur.itersize = chunk_size
+            where, params = "", ()
+            if status:
+                where, params = "WHERE status = %s", (status,)
+            fields = ', '.join(EXPORT_FIELDS)
+            cur.execute(f"""
+                SELECT {fields} FROM tasks {where}
+                UNION ALL
+                SELECT {fields} FROM {ARCHIVE_TABLE} {where}
+                ORDER BY id
+            """, params * 2)
+            for row in cur:
+                yield dict(zip(EXPORT_FIELDS, row))
+        conn.commit()
+    finally:
+        conn.close()
+
+def _to_text(task):
+    """Valeurs sérialisables : dates ISO 8601, tags en liste."""
+    return {
+        k: v.isoformat() if isinstance(v, datetime) else v
+        for k, v in task.items()
+    }
+
+def export_tasks(fp, fmt="csv", status=None):
+    """Écrit les tâches dans le fichier texte `fp`. Retourne le nombre de lignes."""
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(fp, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for task in iter_tasks(status):
+            row = _to_text(task)
+            row["tags"] = TAG_SEP.join(row["tags"] or [])
+            writer.writerow(row)
+            count += 1
+    else:
+        for task in iter_tasks(status):
+            fp.write(json.dumps(_to_text(task), ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+def _parse_task(raw):
+    """Ligne lue (CSV : chaînes ; JSON : types natifs) -> dict pour add_tasks."""
+    task = {k: raw.get(k) for k in IMPORT_FIELDS}
+    for k, v in task.items():
+        if v == "":
+            task[k] = None
+    if not task["title"]:
+        raise ValueError(f"Tâche sans titre : {raw}")
+    if task["priority"] is not None:
+        task["priority"] = int(task["priority"])
+    if isinstance(task["tags"], str):
+        task["tags"] = [t.strip() for t in task["tags"].split(TAG_SEP) if t.strip()]
+    for k in DATE_FIELDS:
+        if isinstance(task[k], str):
+            task[k] = datetime.fromisoformat(task[k])
+    return task  # Dates absentes : complétées par add_tasks
+
+def read_tasks(fp, fmt="csv"):
+    """Génère les tâches lues dans `fp`, une ligne à la fois."""
+    if fmt == "csv":
+        rows = csv.DictReader(fp)
+    else:
+        rows = (json.loads(line) for line in fp if line.strip())
+    for raw in rows:
+        yield _parse_task(raw)
+
+def import_tasks(fp, fmt="csv", chunk_size=BULK_PAGE_SIZE):
+    """Importe un fichier de tâches (une transaction). Retourne le nombre de tâches créées."""
+    return add_tasks(read_tasks(fp, fmt), page_size=chunk_size)
+
+def _guess_format(path, fmt):
+    if fmt:
+        return fmt
+    return "json" if path.endswith((".json", ".jsonl", ".ndjson")) else "csv"
+
+def main():
+    parser = argparse.ArgumentParser(description="Import / export des tâches PolyTask.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("path", help="Fichier CSV / JSON Lines ('-' pour stdin/stdout)")
+    parser.add_argument("--format", choices=FORMATS, help="Par défaut : déduit de l'extension")
+    parser.add_argument("--status", choices=["pending", "done"], help="Export : filtrer par statut")
+    args = parser.parse_args()
+    fmt = _guess_format(args.path, args.format)
+
+    if args.action == "export":
+        if args.path == "-":
+            count = export_tasks(sys.stdout, fmt, args.status)
+        else:
+            with open(args.path, "w", newline="", encoding="utf-8") as fp:
+                count = export_tasks(fp, fmt, args.status)
+        print(f"✅ {count} tâches exportées.", file=sys.stderr)
+    else:
+        if args.path == "-":
+            count = import_tasks(sys.stdin, fmt)
+        else:
+            with open(args.path, newline="", encoding="utf-8") as fp:
+                count = import_tasks(fp, fmt)
+        print(f"✅ {count} tâches importées.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
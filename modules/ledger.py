@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from database.db import record_sent_alert, delete_sent_alert, get_sent_alerts, purge_sent_alerts
+
+# ==============================================================================
+# REGISTRE DES ALERTES ENVOYÉES (Anti-doublon persistant)
+# ==============================================================================
+# Clé : (task_id, kind, due_date) -> une tâche replanifiée est de nouveau alertée.
+# En mémoire : OrderedDict trié par date d'expiration (insertion chronologique,
+# TTL constant) -> l'expiration consomme la tête de la file en O(1) amorti.
+# En base : table sent_alerts, relue au démarrage pour survivre aux redémarrages.
+
+class AlertLedger:
+    """Ensemble des alertes déjà envoyées, avec expiration et persistance Postgres."""
+
+    def __init__(self, ttl_sec=3600):
+        self.ttl_sec = ttl_sec
+        self._entries = OrderedDict()   # key -> expires_at (time.monotonic)
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._entries:
+            key, expires_at = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            self._entries.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            self._expire(time.monotonic())
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            self._expire(time.monotonic())
+            return len(self._entries)
+
+    def _remember(self, key, age=0.0):
+        self._entries[key] = time.monotonic() + self.ttl_sec - age
+        self._entries.move_to_end(key)
+
+    def claim(self, task_id, kind, due_date):
+        """Réserve l'alerte avant envoi. Retourne False si elle est déjà partie."""
+        key = (task_id, kind, due_date)
+        if key in self:
+            return False
+        # La base tranche en cas de course (ON CONFLICT DO NOTHING)
+        claimed = record_sent_alert(task_id, kind, due_date)
+        with self._lock:
+            self._remember(key)
+        return claimed
+
+    def release(self, task_id, kind, due_date):
+        """Annule une réservation dont l'envoi a échoué (mémoire puis base)."""
+        with self._lock:
+            self._entries.pop((task_id, kind, due_date), None)
+        delete_sent_alert(task_id, kind, due_date)
+
+    def load(self):
+        """Recharge les alertes récentes depuis Postgres (au démarrage)."""
+        now = datetime.now()
+        rows = get_sent_alerts(since=now - timedelta(seconds=self.ttl_sec))
+        with self._lock:
+            # Lignes triées par sent_at : l'ordre d'expiration est préservé
+            for task_id, kind, due_date, sent_at in rows:
+                self._remember((task_id, kind, due_date), age=(now - sent_at).total_seconds())
+        return len(rows)
+
+    def purge(self):
+        """Purge les entrées expirées en mémoire et en base."""
+        with self._lock:
+            self._expire(time.monotonic())
+        return purge_sent_alerts(before=datetime.now() - timedelta(seconds=self.ttl_sec))
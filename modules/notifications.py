@@ -1,27 +1,268 @@
+import logging
 import requests
 import os
+import queue
+import random
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from modules.observability import TELEGRAM_REQUEST_SECONDS, register_stats
 
-def send_telegram(message):
-    """Envoie un message Telegram si les tokens sont présents."""
-    token = os.getenv("TELEGRAM_HOMELAB_TOKEN")
-    chat_ids = tuple(
-        chat_id.strip()
-        for chat_id in os.getenv("TELEGRAM_CHAT_IDS", "").split(",")
-        if chat_id.strip()
-    )
-    
-    if not token or not chat_ids:
-        print("⚠️ Pas de config Telegram trouvée.")
+# ==============================================================================
+# ENVOI TELEGRAM ASYNCHRONE (File bornée + Workers + Session keep-alive)
+# ==============================================================================
+# send_telegram() ne fait plus d'I/O réseau : il dépose un message par chat dans
+# une file bornée. Des workers dédiés l'envoient via une session HTTP persistante,
+# en respectant les limites Telegram (~30 msg/s au total, ~1 msg/s par chat) et
+# en réessayant avec backoff sur 429 / erreurs réseau.
+# Chaque chat est affecté à un worker fixe : l'ordre des messages d'un même chat
+# est préservé, et les chats différents partent en parallèle.
+# Un échec n'est pas silencieux : file pleine -> DeliveryError tout de suite ;
+# abandon après toutes les tentatives -> on_failure(chat_id, message) depuis le worker.
+
+log = logging.getLogger(__name__)
+
+# Surchargeable (serveur Telegram bouchon des benchmarks, proxy API local...)
+API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+TELEGRAM_MAX_LEN = 4096  # Longueur maximale d'un message (sendMessage)
+
+def split_message(message, limit=TELEGRAM_MAX_LEN):
+    """Découpe un message trop long en morceaux <= limit.
+
+    Les sections (blocs séparés par une ligne vide) restent entières tant
+    qu'elles tiennent dans un morceau ; sinon on coupe aux sauts de ligne, et
+    seule une ligne plus longue que `limit` est coupée en plein milieu.
+    """
+    if len(message) <= limit:
+        return [message]
+    units = []  # (séparateur avec le morceau précédent, texte)
+    for section in message.split("\n\n"):
+        if len(section) <= limit:
+            units.append(("\n\n", section))
+            continue
+        for i, line in enumerate(section.split("\n")):
+            for j in range(0, max(len(line), 1), limit):
+                sep = ("\n\n" if i == 0 else "\n") if j == 0 else ""
+                units.append((sep, line[j:j + limit]))
+    chunks, current = [], None
+    for sep, text in units:
+        if current is not None and len(current) + len(sep) + len(text) <= limit:
+            current += sep + text
+        else:
+            if current is not None:
+                chunks.append(current)
+            current = text
+    chunks.append(current)
+    return chunks
+
+class DeliveryError(RuntimeError):
+    """Message non mis en file d'envoi (file pleine)."""
+
+class TokenBucket:
+    """Seau à jetons thread-safe : `rate` jetons/s, rafale de `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloque jusqu'à obtenir un jeton."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                missing = (1 - self._tokens) / self.rate
+            time.sleep(missing)
+
+class TelegramDispatcher:
+    """Pool de workers qui livre les messages Telegram sans bloquer l'appelant."""
+
+    def __init__(self, token, chat_ids, workers=4, queue_size=500,
+                 global_rate=25, per_chat_rate=1, max_retries=5, timeout=5):
+        self.url = f"{API_URL}/bot{token}/sendMessage"
+        self.chat_ids = chat_ids
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        # Session persistante : la connexion TLS est réutilisée entre les envois
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=workers))
+
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._global_bucket = TokenBucket(global_rate, global_rate)
+        self._chat_buckets = {chat_id: TokenBucket(per_chat_rate, 3) for chat_id in chat_ids}
+        self._threads = []
+
+        self._stats_lock = threading.Lock()
+        self._stats = {"enqueued": 0, "sent": 0, "failed": 0, "dropped": 0, "retries": 0}
+
+    def _bump(self, key):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queued"] = sum(q.qsize() for q in self._queues)
+        return stats
+
+    # --- Cycle de vie ---
+    def start(self):
+        for i, q in enumerate(self._queues):
+            t = threading.Thread(target=self._worker, args=(q,), name=f"telegram-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def flush(self, timeout=10):
+        """Attend (au plus `timeout` s) que les files soient vidées. Retourne True si vides."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if all(q.unfinished_tasks == 0 for q in self._queues):
+                return True
+            time.sleep(0.1)
+        return False
+
+    # --- Production (non bloquante) ---
+    def submit(self, message, on_failure=None):
+        """Dépose le message pour chaque chat. Ne bloque jamais.
+
+        Lève DeliveryError si la file d'un chat est pleine (les autres chats le
+        reçoivent quand même). on_failure(chat_id, message) est appelé par le
+        worker si la livraison échoue après toutes les tentatives.
+        """
+        dropped = 0
+        for i, chat_id in enumerate(self.chat_ids):
+            q = self._queues[i % len(self._queues)]
+            try:
+                q.put_nowait((chat_id, message, on_failure))
+                self._bump("enqueued")
+            except queue.Full:
+                dropped += 1
+                self._bump("dropped")
+                log.warning("⚠️ File Telegram pleine, message non envoyé", extra={"chat_id": chat_id})
+        if dropped:
+            raise DeliveryError(f"File Telegram pleine pour {dropped} chat(s)")
+
+    # --- Consommation ---
+    def _worker(self, q):
+        while True:
+            chat_id, message, on_failure = q.get()
+            try:
+                try:
+                    delivered = self._deliver(chat_id, message)
+                except Exception:
+                    # Une erreur sur un chat n'empêche pas l'envoi aux autres
+                    self._bump("failed")
+                    log.exception("❌ Erreur envoi Telegram", extra={"chat_id": chat_id})
+                    delivered = False
+                if not delivered and on_failure is not None:
+                    try:
+                        on_failure(chat_id, message)
+                    except Exception:
+                        log.exception("❌ Erreur du rappel d'échec Telegram")
+            finally:
+                q.task_done()
+
+    def _deliver(self, chat_id, message):
+        """Envoie avec nouvelles tentatives. False : abandon sur erreurs passagères.
+
+        Un refus définitif (4xx hors 429) n'est pas réessayé : True, comme un envoi réussi.
+        """
+        payload = {"chat_id": chat_id, "text": message, "parse_mode": "Markdown"}
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._bump("retries")
+            self._chat_buckets[chat_id].acquire()
+            self._global_bucket.acquire()
+            start = time.perf_counter()
+            try:
+                resp = self.session.post(self.url, json=payload, timeout=self.timeout)
+            except requests.RequestException as e:
+                TELEGRAM_REQUEST_SECONDS.labels("error").observe(time.perf_counter() - start)
+                log.warning("⚠️ Telegram injoignable (%s), tentative %d/%d", e, attempt + 1, self.max_retries + 1,
+                            extra={"chat_id": chat_id})
+                time.sleep(self._backoff(attempt))
+                continue
+            TELEGRAM_REQUEST_SECONDS.labels(self._outcome(resp.status_code)).observe(time.perf_counter() - start)
+
+            if resp.ok:
+                self._bump("sent")
+                return True
+            if resp.status_code == 429:
+                # Telegram indique le délai à respecter dans parameters.retry_after
+                try:
+                    retry_after = resp.json().get("parameters", {}).get("retry_after", 1)
+                except ValueError:
+                    retry_after = self._backoff(attempt)
+                time.sleep(retry_after)
+                continue
+            if resp.status_code >= 500:
+                time.sleep(self._backoff(attempt))
+                continue
+            # 4xx (chat inconnu, Markdown invalide...) : inutile de réessayer
+            self._bump("failed")
+            log.error("❌ Telegram a refusé le message : %s %s", resp.status_code, resp.text[:200],
+                      extra={"chat_id": chat_id})
+            return True
+
+        self._bump("failed")
+        log.error("❌ Abandon envoi Telegram après %d tentatives", self.max_retries + 1,
+                  extra={"chat_id": chat_id})
+        return False
+
+    @staticmethod
+    def _outcome(status_code):
+        """Libellé de la métrique de latence : ok, 429, 4xx, 5xx."""
+        if status_code < 400:
+            return "ok"
+        if status_code == 429:
+            return "429"
+        return f"{status_code // 100}xx"
+
+    @staticmethod
+    def _backoff(attempt):
+        """Backoff exponentiel plafonné à 60s, avec gigue."""
+        return min(2 ** attempt, 60) + random.uniform(0, 1)
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def get_dispatcher():
+    """Dispatcher unique du processus (None si Telegram n'est pas configuré)."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                token = os.getenv("TELEGRAM_HOMELAB_TOKEN")
+                chat_ids = tuple(
+                    chat_id.strip()
+                    for chat_id in os.getenv("TELEGRAM_CHAT_IDS", "").split(",")
+                    if chat_id.strip()
+                )
+                if not token or not chat_ids:
+                    return None
+                _dispatcher = TelegramDispatcher(token, chat_ids).start()
+                register_stats("telegram", _dispatcher.stats, gauges=("queued",))
+    return _dispatcher
+
+def send_telegram(message, on_failure=None):
+    """Met un message Telegram en file d'envoi si les tokens sont présents (non bloquant).
+
+    Un message de plus de TELEGRAM_MAX_LEN caractères part en plusieurs envois
+    (l'ordre est préservé : un chat est toujours servi par le même worker).
+    Lève DeliveryError si la file est pleine ; on_failure : voir TelegramDispatcher.submit.
+    """
+    dispatcher = get_dispatcher()
+    if dispatcher is None:
+        log.warning("⚠️ Pas de config Telegram trouvée.")
         return
-    
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    try:
-        # Pas de proxy spécifique ici, on utilise le NAT du serveur
-        for chat_id in chat_ids:
-            requests.post(
-                url,
-                json={"chat_id": chat_id, "text": message, "parse_mode": "Markdown"},
-                timeout=5,
-            )
-    except Exception as e:
-        print(f"❌ Erreur envoi Telegram: {e}")
+    for chunk in split_message(message):
+        dispatcher.submit(chunk, on_failure)
@@ -0,0 +1,171 @@
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# ==============================================================================
+# OBSERVABILITÉ (Logs structurés + métriques Prometheus)
+# ==============================================================================
+# Logs : module `logging` standard, une ligne JSON par événement si
+# LOG_FORMAT=json (sinon texte lisible). Les champs passés via extra={...}
+# deviennent des clés du JSON.
+# Métriques : exposées au format Prometheus sur METRICS_PORT (désactivé si vide),
+# par le processus scheduler et par le processus Streamlit.
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()     # text | json
+METRICS_PORT = int(os.getenv("METRICS_PORT") or 0)      # 0 = pas d'endpoint
+METRICS_ADDR = os.getenv("METRICS_ADDR", "0.0.0.0")
+
+# --- 1. LOGS STRUCTURÉS ---
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par log : ts, level, logger, msg + champs `extra`."""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RESERVED})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+_logging_ready = False
+
+def setup_logging(level=LOG_LEVEL, fmt=LOG_FORMAT):
+    """Configure le logger racine (une seule fois par processus)."""
+    global _logging_ready
+    if _logging_ready:
+        return
+    handler = logging.StreamHandler(sys.stdout)
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(name)s : %(message)s"))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(level)
+    _logging_ready = True
+
+# --- 2. MÉTRIQUES ---
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+ROW_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000)
+LAG_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600)
+
+DB_QUERY_SECONDS = Histogram("polytask_db_query_seconds", "Durée des fonctions de database/db.py",
+                             ["function"], buckets=LATENCY_BUCKETS)
+DB_ROWS = Histogram("polytask_db_rows", "Lignes retournées par fonction de lecture",
+                    ["function"], buckets=ROW_BUCKETS)
+DB_ERRORS = Counter("polytask_db_errors_total", "Fonctions de database/db.py en erreur", ["function"])
+
+SCHEDULER_TICK_SECONDS = Histogram("polytask_scheduler_tick_seconds", "Durée d'un passage check_deadlines",
+                                   buckets=LATENCY_BUCKETS)
+SCHEDULER_LAST_TICK = Gauge("polytask_scheduler_last_tick_timestamp_seconds",
+                            "Horodatage (epoch) du dernier passage du scheduler")
+SCHEDULER_LEADER = Gauge("polytask_scheduler_leader", "1 si cette instance détient le verrou de leader")
+REMINDER_LAG_SECONDS = Histogram("polytask_reminder_lag_seconds",
+                                 "Retard d'envoi d'une alerte par rapport à son heure prévue",
+                                 ["kind"], buckets=LAG_BUCKETS)
+REMINDERS_SENT = Counter("polytask_reminders_total", "Alertes envoyées", ["kind"])
+REMINDERS_MISSED = Counter("polytask_reminders_missed_total",
+                           "Alertes abandonnées (heure prévue dépassée de plus que la grâce)", ["kind"])
+
+TELEGRAM_REQUEST_SECONDS = Histogram("polytask_telegram_request_seconds", "Durée d'un appel sendMessage",
+                                     ["outcome"], buckets=LATENCY_BUCKETS)
+
+UI_RERUN_SECONDS = Histogram("polytask_ui_rerun_seconds", "Durée d'exécution du script Streamlit",
+                             ["scope"], buckets=LATENCY_BUCKETS)
+
+def _row_count(result):
+    """Nombre de lignes d'un résultat (DataFrame, liste, dict, (df, total)) ; None si non pertinent."""
+    if isinstance(result, tuple) and result and hasattr(result[0], "__len__"):
+        result = result[0]
+    if isinstance(result, (list, dict)) or hasattr(result, "shape"):
+        return len(result)
+    return None
+
+def instrument_query(fn):
+    """Décorateur : durée, lignes retournées et erreurs d'une fonction d'accès aux données."""
+    name = fn.__name__
+    seconds = DB_QUERY_SECONDS.labels(name)
+    rows = DB_ROWS.labels(name)
+    errors = DB_ERRORS.labels(name)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            seconds.observe(time.perf_counter() - start)
+        count = _row_count(result)
+        if count is not None:
+            rows.observe(count)
+        return result
+    return wrapper
+
+# --- 3. COMPTEURS EXISTANTS (pool, cache, file Telegram) ---
+# Les modules qui tiennent déjà leurs propres compteurs les déclarent ici ;
+# ils sont lus au moment du scrape, sans double comptabilité.
+_sources = {}
+_sources_lock = threading.Lock()
+
+def register_stats(prefix, stats_fn, gauges=()):
+    """Expose stats_fn() -> {clé: nombre} en polytask_<prefix>_<clé>.
+
+    Les clés de `gauges` sont des jauges ; les autres des compteurs (suffixe _total).
+    """
+    with _sources_lock:
+        _sources[prefix] = (stats_fn, set(gauges))
+
+class _StatsCollector:
+    def collect(self):
+        with _sources_lock:
+            sources = list(_sources.items())
+        for prefix, (stats_fn, gauges) in sources:
+            try:
+                stats = stats_fn()
+            except Exception:
+                logging.getLogger(__name__).exception("Lecture des stats '%s' impossible", prefix)
+                continue
+            for key, value in stats.items():
+                if not isinstance(value, (int, float)):
+                    continue
+                name = f"polytask_{prefix}_{key}"
+                if key in gauges:
+                    family = GaugeMetricFamily(name, f"{prefix} : {key}")
+                else:
+                    family = CounterMetricFamily(name, f"{prefix} : {key}")
+                family.add_metric([], value)
+                yield family
+
+REGISTRY.register(_StatsCollector())
+
+# --- 4. ENDPOINT HTTP ---
+_server_started = False
+_server_lock = threading.Lock()
+
+def start_metrics_server(port=METRICS_PORT, addr=METRICS_ADDR):
+    """Démarre l'endpoint /metrics (une fois par processus). Retourne True s'il écoute."""
+    global _server_started
+    if not port:
+        return False
+    with _server_lock:
+        if not _server_started:
+            start_http_server(port, addr)
+            _server_started = True
+            logging.getLogger(__name__).info("📈 Métriques Prometheus sur http://%s:%s/metrics", addr, port)
+    return True
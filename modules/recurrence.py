@@ -0,0 +1,56 @@
+import logging
+from database.db import refresh_series
+
+log = logging.getLogger(__name__)
+
+# ==============================================================================
+# TÂCHES RÉCURRENTES (Libellés des règles + maintenance périodique)
+# ==============================================================================
+# La règle d'une série (fréquence, intervalle, fin) est stockée une seule fois
+# dans task_series ; tasks n'en contient que l'occurrence en attente. Postgres
+# calcule les dates et crée l'occurrence suivante quand la courante est terminée
+# (voir schema.sql). Ce module fournit les libellés pour l'UI et le job du
+# scheduler qui garde les occurrences en retard alignées sur la prochaine date.
+
+FREQ_DAILY = 'daily'
+FREQ_WEEKLY = 'weekly'
+FREQ_MONTHLY = 'monthly'
+
+# Libellé du formulaire -> fréquence stockée (None : tâche ponctuelle)
+FREQ_CHOICES = {
+    "Aucune": None,
+    "Quotidienne": FREQ_DAILY,
+    "Hebdomadaire": FREQ_WEEKLY,
+    "Mensuelle": FREQ_MONTHLY,
+}
+
+# (tous/toutes, unité au singulier, unité au pluriel)
+_UNITS = {
+    FREQ_DAILY: ("Tous", "jour", "jours"),
+    FREQ_WEEKLY: ("Toutes", "semaine", "semaines"),
+    FREQ_MONTHLY: ("Tous", "mois", "mois"),
+}
+
+def describe_rule(freq, every=1, until_at=None, max_count=None):
+    """'Toutes les 2 semaines, jusqu'au 31/12, 10 fois' (libellé court d'une règle)."""
+    article, one, many = _UNITS[freq]
+    if every == 1:
+        text = f"{article} les {many}"
+    else:
+        text = f"{article} les {every} {many}"
+    if until_at:
+        text += f", jusqu'au {until_at.strftime('%d/%m/%Y')}"
+    if max_count:
+        text += f", {max_count} fois"
+    return text
+
+def refresh_recurring(horizon_sec):
+    """Job du scheduler : reporte les occurrences en retard, crée les manquantes."""
+    try:
+        result = refresh_series(horizon_sec)
+        if any(result.values()):
+            log.info("🔁 Séries : %(rolled)s reportées, %(created)s créées, %(finished)s terminées.",
+                     result, extra=result)
+        return result
+    except Exception:
+        log.exception("❌ Erreur refresh_recurring")
@@ -0,0 +1,263 @@
+import heapq
+import itertools
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from database.db import get_upcoming_deadlines
+from modules.notifications import send_telegram
+from modules.ledger import AlertLedger
+from modules.observability import REMINDER_LAG_SECONDS, REMINDERS_SENT, REMINDERS_MISSED
+
+log = logging.getLogger(__name__)
+
+# ==============================================================================
+# MOTEUR DE RAPPELS (Tas binaire des prochains déclenchements)
+# ==============================================================================
+# Au lieu de scruter la base toutes les 10s, on garde en mémoire un tas (min-heap)
+# des prochains déclenchements "_prevent" (T - prévenance) et "_now" (T = 0).
+# Le scheduler dort jusqu'au prochain déclenchement et se réveille plus tôt si
+# une tâche est ajoutée / terminée / supprimée / replanifiée.
+
+KIND_PREVENT = "prevent"
+KIND_NOW = "now"
+RETRY_SEC = 10  # Délai avant une nouvelle tentative d'une alerte en échec (réservation ou envoi)
+
+def format_alert(kind, row, reminder_minutes):
+    """Message Telegram d'une alerte (formats historiques conservés)."""
+    if kind == KIND_PREVENT:
+        return (
+            f"⏰ **RAPPEL -{reminder_minutes} min**\n\n"
+            f"📌 *{row.title}*\n"
+            f"🕒 Prévu à : {row.due_date.strftime('%H:%M')}"
+        )
+    prio_icon = "🔴" if row.priority == 3 else "🟠"
+    return (
+        f"🚨 **C'EST L'HEURE !**\n\n"
+        f"{prio_icon} *{row.title}*\n"
+        f"📂 Groupe : {row.group_name}"
+    )
+
+def format_digest(alerts, reminder_minutes):
+    """Message unique regroupant plusieurs alertes [(kind, row), ...] du même instant."""
+    prevent = [row for kind, row in alerts if kind == KIND_PREVENT]
+    now = [row for kind, row in alerts if kind == KIND_NOW]
+    lines = [f"🔔 **{len(alerts)} RAPPELS**"]
+    if now:
+        lines.append("\n🚨 **C'EST L'HEURE !**")
+        for row in now:
+            prio_icon = "🔴" if row.priority == 3 else "🟠"
+            lines.append(f"{prio_icon} *{row.title}* — 📂 {row.group_name}")
+    if prevent:
+        lines.append(f"\n⏰ **Dans {reminder_minutes} min :**")
+        for row in prevent:
+            lines.append(f"📌 *{row.title}* — 🕒 {row.due_date.strftime('%H:%M')}")
+    return "\n".join(lines)
+
+class ReminderEngine:
+    """Planifie les alertes d'échéance à la seconde près, sans polling."""
+
+    def __init__(self, reminder_minutes=5, ledger=None, horizon_sec=3600, grace_sec=60,
+                 digest=True, digest_window_sec=0):
+        self.reminder_minutes = reminder_minutes
+        self.digest = digest                    # Regrouper les alertes simultanées en un message
+        self.digest_window_sec = digest_window_sec  # Attente max pour grouper des alertes proches
+        self.horizon_sec = horizon_sec    # Fenêtre chargée en mémoire (au-delà : rechargement)
+        self.grace_sec = grace_sec        # Retard toléré pour une alerte manquée (redémarrage...)
+        self.ledger = ledger if ledger is not None else AlertLedger()
+        self._heap = []                   # (fire_at, seq, kind, row)
+        self._seq = itertools.count()     # Départage les égalités sans comparer les dicts
+        self._loaded_until = None
+        self._dirty = True
+        self._wake = threading.Event()
+        self._missed = set()              # Alertes manquées déjà comptées (métrique)
+        self._retry = {}                  # Alertes en échec -> prochaine tentative (jamais abandonnées)
+        self._undelivered = deque()       # Lots abandonnés par un worker Telegram (thread-safe)
+        self.digest_stats = {"alerts": 0, "messages": 0, "digests": 0}
+
+    def configure(self, reminder_minutes, digest, digest_window_sec):
+        """Applique de nouveaux réglages (config rechargée) : la fenêtre est recalculée."""
+        self.reminder_minutes = reminder_minutes
+        self.digest = digest
+        self.digest_window_sec = digest_window_sec
+        self.notify_change()
+
+    # --- Réveil anticipé (appelé depuis n'importe quel thread) ---
+    def notify_change(self, event=None):
+        """Abonné du bus database.events : une tâche a changé -> on recharge."""
+        if event is None or event.table in ('tasks', '*'):
+            self._dirty = True
+            self._wake.set()
+
+    def wait(self, timeout):
+        """Dort `timeout` secondes au plus, ou jusqu'à notify_change()."""
+        self._wake.wait(max(timeout, 0))
+        self._wake.clear()
+
+    # --- Chargement de la fenêtre ---
+    def reload(self, now=None):
+        """Reconstruit le tas à partir des échéances de la fenêtre [now - grâce ; now + horizon]."""
+        now = now or datetime.now()
+        reminder = timedelta(minutes=self.reminder_minutes)
+        grace_sec = self.grace_sec
+        if self._retry:
+            # Les alertes en échec restent dans la fenêtre, quel que soit leur retard
+            oldest_due = min(due_date for _, _, due_date in self._retry)
+            grace_sec = max(grace_sec, (now - oldest_due).total_seconds() + 1)
+        # Remis à zéro AVANT la requête : un notify_change() arrivé pendant la
+        # lecture (thread du listener) redemande un rechargement au lieu d'être perdu
+        self._dirty = False
+        try:
+            rows = get_upcoming_deadlines(
+                horizon_sec=self.horizon_sec + reminder.total_seconds(),
+                grace_sec=grace_sec,
+                now=now,
+            )
+        except Exception:
+            self._dirty = True
+            raise
+        oldest = now - timedelta(seconds=self.grace_sec)
+        heap = []
+        retry = {}
+        for row in rows:
+            for kind, fire_at in ((KIND_PREVENT, row.due_date - reminder), (KIND_NOW, row.due_date)):
+                key = (row.id, kind, row.due_date)
+                if key in self.ledger:
+                    continue
+                if key in self._retry:
+                    retry[key] = self._retry[key]
+                    heap.append((max(fire_at, retry[key]), next(self._seq), kind, row))
+                elif fire_at >= oldest:
+                    heap.append((fire_at, next(self._seq), kind, row))
+                elif row.created_at is not None and fire_at < row.created_at:
+                    # Heure déjà passée à la création (tâche ajoutée < prévenance avant
+                    # l'échéance) : rien n'a été manqué, pas de fausse alerte sur la métrique
+                    continue
+                elif key not in self._missed:
+                    # Heure dépassée de plus que la grâce (arrêt, panne...) : alerte abandonnée
+                    if len(self._missed) > 10_000:
+                        self._missed.clear()
+                    self._missed.add(key)
+                    REMINDERS_MISSED.labels(kind).inc()
+        heapq.heapify(heap)
+        self._heap = heap
+        self._retry = retry  # Tâches terminées / supprimées entre-temps : plus rien à réessayer
+        self._loaded_until = now + timedelta(seconds=self.horizon_sec)
+
+    def _next_fire(self):
+        """Instant où le prochain lot doit partir (1re alerte + fenêtre de regroupement)."""
+        window = self.digest_window_sec if self.digest else 0
+        return self._heap[0][0] + timedelta(seconds=window)
+
+    def seconds_until_next(self, now=None):
+        """Délai avant le prochain déclenchement ou le prochain rechargement de fenêtre."""
+        now = now or datetime.now()
+        if self._dirty or self._loaded_until is None:
+            return 0
+        deadline = self._loaded_until
+        if self._heap:
+            deadline = min(deadline, self._next_fire())
+        return (deadline - now).total_seconds()
+
+    def messages_saved(self):
+        """Nombre de messages économisés par le regroupement (par chat)."""
+        return self.digest_stats["alerts"] - self.digest_stats["messages"]
+
+    # --- Déclenchement ---
+    def run_pending(self, now=None):
+        """Envoie les alertes arrivées à échéance. Retourne le nombre d'alertes envoyées."""
+        now = now or datetime.now()
+        self._requeue_undelivered(now)
+        due_soon = self._heap and self._next_fire() <= now
+        # On relit la fenêtre juste avant de tirer : une tâche terminée entre-temps
+        # (ex: depuis un autre processus) ne déclenche pas d'alerte fantôme.
+        if self._dirty or due_soon or self._loaded_until is None or now >= self._loaded_until:
+            self.reload(now)
+        if not self._heap or self._next_fire() > now:
+            return 0
+
+        claimed, failed = [], []
+        while self._heap and self._heap[0][0] <= now:
+            item = heapq.heappop(self._heap)
+            _, _, kind, row = item
+            try:
+                # Réservation avant envoi : au plus une alerte, même après redémarrage
+                if self.ledger.claim(row.id, kind, row.due_date):
+                    claimed.append(item)
+            except Exception:
+                log.exception("❌ Réservation de l'alerte %s (tâche %s) impossible", kind, row.id)
+                failed.append(item)
+
+        # Plusieurs alertes au même instant -> un seul message récapitulatif par chat
+        if self.digest and len(claimed) > 1:
+            batches = [claimed]
+        else:
+            batches = [[item] for item in claimed]
+        sent = 0
+        for batch in batches:
+            if self._send(batch, now):
+                sent += len(batch)
+            else:
+                failed += batch
+
+        for _, _, kind, row in failed:
+            self._retry_later(kind, row, now)
+        return sent
+
+    def _send(self, batch, now):
+        """Met en file un lot d'alertes réservées. En cas d'échec, les réservations sont annulées.
+
+        La livraison elle-même est asynchrone : si un worker Telegram l'abandonne,
+        le lot revient par _undelivered et est réessayé au prochain run_pending().
+        """
+        def on_failure(chat_id, message):
+            self._undelivered.append(batch)
+            self._wake.set()
+
+        try:
+            if len(batch) > 1:
+                send_telegram(format_digest([(kind, row) for _, _, kind, row in batch], self.reminder_minutes),
+                              on_failure=on_failure)
+                self.digest_stats["digests"] += 1
+            else:
+                _, _, kind, row = batch[0]
+                send_telegram(format_alert(kind, row, self.reminder_minutes), on_failure=on_failure)
+        except Exception:
+            log.exception("❌ Envoi de %d alerte(s) impossible, nouvel essai dans %ds", len(batch), RETRY_SEC)
+            self._release(batch)
+            return False
+        self.digest_stats["messages"] += 1
+        self.digest_stats["alerts"] += len(batch)
+        for fire_at, _, kind, row in batch:
+            self._retry.pop((row.id, kind, row.due_date), None)
+            REMINDER_LAG_SECONDS.labels(kind).observe(max((now - fire_at).total_seconds(), 0))
+            REMINDERS_SENT.labels(kind).inc()
+        return True
+
+    def _release(self, batch):
+        for _, _, kind, row in batch:
+            try:
+                self.ledger.release(row.id, kind, row.due_date)
+            except Exception:
+                log.exception("❌ Réservation de l'alerte %s (tâche %s) non annulée", kind, row.id)
+
+    def _requeue_undelivered(self, now):
+        """Lots non livrés (signalés par les workers) : réservations annulées, nouvel essai."""
+        seen = set()
+        while self._undelivered:
+            batch = self._undelivered.popleft()
+            # Un lot peut être signalé une fois par chat et par morceau de message
+            batch = [item for item in batch if (item[3].id, item[2], item[3].due_date) not in seen]
+            seen.update((row.id, kind, row.due_date) for _, _, kind, row in batch)
+            if not batch:
+                continue
+            log.warning("⚠️ %d alerte(s) non livrée(s), nouvel essai dans %ds", len(batch), RETRY_SEC)
+            self._release(batch)
+            for _, _, kind, row in batch:
+                self._retry_later(kind, row, now)
+
+    def _retry_later(self, kind, row, now):
+        """Remet une alerte en échec dans le tas, RETRY_SEC plus tard."""
+        retry_at = now + timedelta(seconds=RETRY_SEC)
+        self._retry[(row.id, kind, row.due_date)] = retry_at
+        heapq.heappush(self._heap, (retry_at, next(self._seq), kind, row))
@@ -0,0 +1,78 @@
+from datetime import datetime, time, timedelta
+from database.db import get_weekly_stats
+
+# ==============================================================================
+# RAPPORT HEBDOMADAIRE (Agrégats SQL -> message Telegram)
+# ==============================================================================
+# Tous les chiffres viennent de database.db.get_weekly_stats (COUNT / AVG /
+# generate_series / LIMIT côté Postgres) : la mémoire utilisée ne dépend pas du
+# nombre de tâches. Le message peut dépasser 4096 caractères avec beaucoup de
+# groupes : send_telegram le découpe aux fins de section.
+
+REPORT_DAYS = 7
+DAY_NAMES = ["Lun", "Mar", "Mer", "Jeu", "Ven", "Sam", "Dim"]
+
+def _prio_icon(priority):
+    return "🔴" if priority == 3 else "🔵"
+
+def _task_line(task):
+    date_str = f" ({task['due_date'].strftime('%d/%m')})" if task['due_date'] else ""
+    return f"{_prio_icon(task['priority'])} {task['title']}{date_str}"
+
+def _format_duration(delta):
+    """timedelta -> '2j 5h' / '3h 20min' / '12 min'."""
+    minutes = int(delta.total_seconds() // 60)
+    days, minutes = divmod(minutes, 24 * 60)
+    hours, minutes = divmod(minutes, 60)
+    if days:
+        return f"{days}j {hours}h"
+    if hours:
+        return f"{hours}h {minutes:02d}min"
+    return f"{minutes} min"
+
+def format_weekly_report(stats, days=REPORT_DAYS, per_group=True):
+    """Construit le bilan (Markdown Telegram) à partir de get_weekly_stats()."""
+    t = stats['totals']
+    sections = []
+
+    if t['pending'] == 0:
+        sections.append("📅 **Bilan Hebdo**\n\nBravo ! Aucune tâche en attente. 🎉")
+    else:
+        sections.append(
+            f"📅 **BILAN HEBDOMADAIRE**\nTotal : **{t['pending']}** tâches (Dont {t['urgent']} urgentes)\n"
+            f"🔥 En retard : {t['overdue']} · ♾️ Sans échéance : {t['nodate']}"
+        )
+
+    # --- Activité de la semaine ---
+    lines = [f"📈 **Activité ({days} derniers jours)**",
+             f"✅ Terminées : **{t['done']}** ({t['done'] / days:.1f}/jour) · ➕ Créées : {t['created']}",
+             f"⚖️ Solde : {t['created'] - t['done']:+d} tâches en attente"]
+    if t['series']:
+        lines.append(f"🔁 Séries actives : {t['series']} ({t['recurring_done']} occurrences terminées)")
+    if t['lead_time'] is not None:
+        lines.append(f"⏱️ Délai moyen création → fin : {_format_duration(t['lead_time'])}")
+    if stats['per_day']:
+        lines.append(" · ".join(f"{DAY_NAMES[day.weekday()]} {n}" for day, n in stats['per_day']))
+    sections.append("\n".join(lines))
+
+    if stats['top']:
+        sections.append("🔥 **Top Priorités :**\n" + "\n".join(_task_line(task) for task in stats['top']))
+
+    # --- Une section par groupe ---
+    if per_group:
+        for g in stats['groups']:
+            lines = [f"📂 **{g['group']}** : {g['pending']} en attente"
+                     f" ({g['urgent']} urgentes, {g['overdue']} en retard) · ✅ {g['done']} terminées"]
+            lines += [_task_line(task) for task in stats['group_top'].get(g['group'], [])]
+            sections.append("\n".join(lines))
+
+    return "\n\n".join(sections)
+
+def build_weekly_report(now=None, days=REPORT_DAYS, top_n=10, group_top_n=3):
+    """Interroge Postgres et retourne le texte du bilan (taille indépendante du volume)."""
+    now = now or datetime.now()
+    # `days` jours calendaires, aujourd'hui compris : autant de jours dans la ligne
+    # par jour que dans la moyenne, et jamais deux fois le même jour de la semaine
+    since = datetime.combine((now - timedelta(days=days - 1)).date(), time.min)
+    stats = get_weekly_stats(since, now, top_n=top_n, group_top_n=group_top_n)
+    return format_weekly_report(stats, days=days, per_group=group_top_n > 0)
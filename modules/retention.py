@@ -0,0 +1,37 @@
+import logging
+from datetime import datetime, timedelta
+from database.db import archive_done_tasks, BULK_PAGE_SIZE
+
+log = logging.getLogger(__name__)
+
+# ==============================================================================
+# RÉTENTION (Archivage des tâches terminées anciennes)
+# ==============================================================================
+# Les tâches terminées depuis plus de `archive_after_days` quittent tasks pour
+# tasks_archive (voir schema.sql) : les requêtes du backlog, du scheduler et du
+# rapport ne traînent plus tout l'historique. Le job tourne dans le scheduler,
+# par paquets bornés ; la vue "Terminées" lit les archives à la demande.
+
+DEFAULT_ARCHIVE_DAYS = 90
+# Le rapport hebdo compte les tâches terminées des 7 derniers jours dans tasks :
+# elles ne doivent pas être archivées avant.
+MIN_ARCHIVE_DAYS = 7
+MAX_CHUNKS_PER_RUN = 100  # 100 paquets de BULK_PAGE_SIZE par passage, le reste au suivant
+CHUNK_PAUSE_SEC = 0.1     # Respiration entre deux paquets (UI / scheduler prioritaires)
+
+def archive_completed(days=DEFAULT_ARCHIVE_DAYS, now=None, chunk_size=BULK_PAGE_SIZE,
+                      max_chunks=MAX_CHUNKS_PER_RUN):
+    """Job du scheduler : archive les tâches terminées il y a plus de `days` jours."""
+    if days < MIN_ARCHIVE_DAYS:
+        log.warning("⚠️ archive_after_days=%s trop court, %s jours utilisés.", days, MIN_ARCHIVE_DAYS)
+        days = MIN_ARCHIVE_DAYS
+    before = (now or datetime.now()) - timedelta(days=days)
+    try:
+        moved = archive_done_tasks(before, chunk_size=chunk_size, max_chunks=max_chunks,
+                                   pause_sec=CHUNK_PAUSE_SEC)
+        if moved:
+            log.info("🗄️ Archivage : %d tâches terminées avant le %s déplacées.",
+                     moved, before.strftime('%d/%m/%Y'), extra={"archived": moved})
+        return moved
+    except Exception:
+        log.exception("❌ Erreur archive_completed")
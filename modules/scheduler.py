@@ -1,162 +1,305 @@
+import argparse
+import logging
+import signal
+import sys
+import threading
 import time
 import schedule
-import yaml
 import os
-import pandas as pd
 from datetime import datetime
-from database.db import get_tasks
-from modules.notifications import send_telegram
+from database.db import pool_stats, cache_stats, init_db, LeaderLock
+from database.events import subscribe
+from database.listener import start_listener
+from modules.notifications import send_telegram, get_dispatcher
+from modules.reminders import ReminderEngine
+from modules.report import build_weekly_report
+from modules.recurrence import refresh_recurring
+from modules.retention import archive_completed
+from modules.settings import settings
+from modules.ledger import AlertLedger
+from modules.observability import (setup_logging, start_metrics_server,
+                                   SCHEDULER_TICK_SECONDS, SCHEDULER_LAST_TICK, SCHEDULER_LEADER)
+
+log = logging.getLogger("modules.scheduler")  # Nom stable, même lancé via -m (__main__)
 
 # ==============================================================================
-# 1. CHARGEMENT CONFIGURATION
+# 1. CONFIGURATION (rechargée à chaud, voir modules/settings.py)
 # ==============================================================================
-# On récupère le chemin absolu pour éviter les erreurs de "File not found"
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-CONFIG_PATH = os.path.join(BASE_DIR, 'config', 'config.yaml')
-
-try:
-    with open(CONFIG_PATH) as f:
-        config = yaml.safe_load(f)
-except Exception as e:
-    print(f"⚠️ Warning: Impossible de charger config.yaml ({e}). Valeurs par défaut utilisées.")
-    config = {}
+# La boucle principale vérifie à chaque tour si config.yaml a changé et applique
+# les nouveaux réglages (délai de prévenance, regroupement, jour / heure du
+# rapport...) sans redémarrage : voir sync_config().
+_applied_version = None
+_report_job = None
 
 # ==============================================================================
-# 2. SYSTÈME ANTI-DOUBLON (CACHE)
+# 2. SYSTÈME ANTI-DOUBLON (REGISTRE PERSISTANT)
 # ==============================================================================
-# Dictionnaire pour se souvenir des alertes déjà envoyées.
-# Format : { "ID_TACHE_TYPE": TIMESTAMP_ENVOI }
-# Ex: { "14_prevent": 1703254020, "14_now": 1703254320 }
-sent_cache = {}
+# Registre des alertes déjà envoyées, clé (task_id, kind, due_date), persisté
+# dans la table sent_alerts pour survivre aux redémarrages (voir modules/ledger.py).
+ledger = AlertLedger(ttl_sec=3600)
+
+# Verrou consultatif Postgres : un seul scheduler actif par déploiement
+leader = LeaderLock()
+LEADER_RETRY = 30  # Intervalle de tentative d'un scheduler en attente (s)
+
+# Arrêt propre (SIGTERM/SIGINT en processus autonome) : réveille toutes les attentes
+_shutdown = threading.Event()
+
+# Battement de coeur : horodatage écrit à chaque tour de boucle (leader ou en veille),
+# lu par `python -m modules.scheduler --health` (healthcheck Docker).
+HEARTBEAT_FILE = os.getenv("SCHEDULER_HEARTBEAT_FILE", "/tmp/polytask-scheduler.heartbeat")
+HEARTBEAT_INTERVAL = 60              # Une boucle ne dort jamais plus longtemps (s)
+HEARTBEAT_MAX_AGE = 3 * HEARTBEAT_INTERVAL
+
+def heartbeat(role):
+    """Écrit '<timestamp> <rôle>' de façon atomique (rename) dans HEARTBEAT_FILE."""
+    tmp = f"{HEARTBEAT_FILE}.tmp"
+    try:
+        with open(tmp, "w") as f:
+            f.write(f"{time.time():.0f} {role}\n")
+        os.replace(tmp, HEARTBEAT_FILE)
+    except OSError as e:
+        log.warning("⚠️ Battement de coeur non écrit (%s).", e)
+
+def check_health(max_age=HEARTBEAT_MAX_AGE):
+    """(ok, message) selon l'âge du dernier battement de coeur."""
+    try:
+        with open(HEARTBEAT_FILE) as f:
+            stamp, role = f.read().split()
+    except (OSError, ValueError):
+        return False, "aucun battement de coeur"
+    age = time.time() - float(stamp)
+    if age > max_age:
+        return False, f"dernier battement il y a {age:.0f}s ({role})"
+    return True, f"{role}, battement il y a {age:.0f}s"
+
+def stop_scheduler(*_):
+    """Demande l'arrêt de la boucle (utilisable comme gestionnaire de signal)."""
+    _shutdown.set()
+    reminders.notify_change()  # Sort immédiatement de reminders.wait()
 
 def clean_cache():
-    """Nettoie le cache toutes les heures pour éviter qu'il ne grossisse indéfiniment."""
-    now = time.time()
-    # On supprime les entrées vieilles de plus de 1 heure (3600s)
-    keys_to_delete = [k for k, v in sent_cache.items() if now - v > 3600]
-    for k in keys_to_delete:
-        del sent_cache[k]
-    # print(f"🧹 Cache nettoyé. {len(sent_cache)} entrées actives.")
+    """Purge horaire des entrées expirées du registre (mémoire + base)."""
+    try:
+        purged = ledger.purge()
+        log.debug("🧹 Registre nettoyé. %d entrées supprimées, %d actives.", purged, len(ledger))
+    except Exception:
+        log.exception("❌ Erreur clean_cache")
+
+def wait_for_leadership():
+    """Bloque jusqu'à obtenir le verrou de leader (les autres instances restent en veille).
+
+    Retourne True une fois leader, False si l'arrêt a été demandé entre-temps.
+    """
+    announced = False
+    while not _shutdown.is_set():
+        try:
+            if leader.try_acquire():
+                SCHEDULER_LEADER.set(1)
+                log.info("👑 Verrou scheduler obtenu : cette instance envoie les alertes.")
+                return True
+        except Exception:
+            log.exception("❌ Erreur verrou scheduler")
+        SCHEDULER_LEADER.set(0)
+        if not announced:
+            log.info("⏸️ Un autre scheduler est actif, mise en veille...")
+            announced = True
+        heartbeat("standby")
+        _shutdown.wait(LEADER_RETRY)
+    return False
+
+def log_pool_stats():
+    """Trace l'état du pool de connexions (saturation, attentes, overflow)."""
+    s = pool_stats()
+    log.info("📊 Pool DB : %d/%d empruntées, overflow=%d, checkouts=%d, waits=%d (%.2fs), "
+             "connects=%d, invalidées=%d", s['checked_out'], s['size'], s['overflow'], s['checkouts'],
+             s['waits'], s['wait_time'], s['connects'], s['invalidated'], extra={"pool": s})
+
+def log_cache_stats():
+    """Trace l'efficacité du cache des lectures (database.db.query_cache)."""
+    s = cache_stats()
+    log.info("📊 Cache lectures : %d hits / %d misses (%.0f%%), %d entrées, %d évictions, %d invalidations",
+             s['hits'], s['misses'], s['hit_rate'] * 100, s['size'], s['evictions'], s['invalidations'],
+             extra={"cache": s})
+
+def log_telegram_stats():
+    """Trace l'état de la file d'envoi Telegram."""
+    dispatcher = get_dispatcher()
+    if dispatcher is None:
+        return
+    s = dispatcher.stats()
+    log.info("📊 Telegram : %d envoyés, %d en file, %d retries, %d échecs, %d perdus",
+             s['sent'], s['queued'], s['retries'], s['failed'], s['dropped'], extra={"telegram": s})
 
 # ==============================================================================
-# 3. VÉRIFICATION DES ÉCHÉANCES
+# 3. MOTEUR DE RAPPELS (Prévenance + Instant T)
 # ==============================================================================
+# Les échéances sont gérées par modules/reminders.py (tas des prochains
+# déclenchements). Le bus database.events réveille le moteur à chaque écriture.
+MAX_SLEEP = 300    # Filet de sécurité : on ne dort jamais plus de 5 min d'affilée
+RETRY_DELAY = 10   # Pause après une erreur (BDD indisponible...) pour éviter une boucle folle
+
+config = settings.get()
+reminders = ReminderEngine(
+    reminder_minutes=config['reminder_minutes'],
+    ledger=ledger,
+    digest=config['reminder_digest'],
+    digest_window_sec=config['reminder_digest_window_sec'],
+)
+subscribe(reminders.notify_change)
+
 def check_deadlines():
-    """Vérifie les tâches et envoie des notifs (Prévenance + Instant T)."""
+    """Envoie les alertes arrivées à échéance (Prévenance + Instant T)."""
     try:
-        df = get_tasks(status='pending')
-        if df.empty: return
-
-        now = datetime.now()
-        # Récupère le délai de prévenance (défaut 5 min), converti en secondes
-        reminder_minutes = config.get('reminder_minutes', 5)
-        reminder_sec = reminder_minutes * 60
-        
-        for _, row in df.iterrows():
-            # Ignorer si pas de date ou date invalide
-            if pd.isna(row['due_date']): continue
-            try:
-                due = row['due_date'].to_pydatetime()
-            except: continue
-
-            # Différence en secondes (Positif = Futur, Négatif = Passé)
-            diff = (due - now).total_seconds()
-            tid = row['id']
-
-            # --- ALERTE 1 : PRÉVENANCE (ex: 5 min avant) ---
-            # On cherche si on est dans la fenêtre [4min30s ... 6min30s]
-            # On prend une fenêtre large (120s) pour être sûr de ne pas rater le coche,
-            # car le cache empêchera les doublons de toute façon.
-            if (reminder_sec - 60) < diff < (reminder_sec + 60):
-                cache_key = f"{tid}_prevent"
-                
-                # Si on n'a pas déjà envoyé cette alerte :
-                if cache_key not in sent_cache:
-                    send_telegram(
-                        f"⏰ **RAPPEL -{reminder_minutes} min**\n\n"
-                        f"📌 *{row['title']}*\n"
-                        f"🕒 Prévu à : {due.strftime('%H:%M')}"
-                    )
-                    # On marque comme envoyé
-                    sent_cache[cache_key] = time.time()
-
-            # --- ALERTE 2 : C'EST L'HEURE (T=0) ---
-            # Fenêtre de tir : entre -60s et +60s autour de l'heure pile
-            elif -60 < diff < 60:
-                cache_key = f"{tid}_now"
-                
-                if cache_key not in sent_cache:
-                    prio_icon = "🔴" if row['priority'] == 3 else "🟠"
-                    send_telegram(
-                        f"🚨 **C'EST L'HEURE !**\n\n"
-                        f"{prio_icon} *{row['title']}*\n"
-                        f"📂 Groupe : {row['group_name']}"
-                    )
-                    sent_cache[cache_key] = time.time()
-
-    except Exception as e:
-        print(f"❌ Erreur check_deadlines: {e}")
+        with SCHEDULER_TICK_SECONDS.time():
+            reminders.run_pending()
+        SCHEDULER_LAST_TICK.set_to_current_time()
+    except Exception:
+        log.exception("❌ Erreur check_deadlines")
+        reminders.wait(RETRY_DELAY)
+
+RECURRENCE_EVERY_MIN = 10  # Maintenance des séries (report des occurrences en retard)
+
+def check_recurring():
+    """Aligne les occurrences récurrentes sur la fenêtre du moteur de rappels."""
+    refresh_recurring(reminders.horizon_sec)
+
+ARCHIVE_EVERY_MIN = 60  # Archivage par paquets bornés : l'arriéré se résorbe en quelques passages
+
+def archive_old_tasks():
+    """Déplace les tâches terminées anciennes vers l'historique froid (tasks_archive)."""
+    days = settings.get()['archive_after_days']
+    if days:  # 0 = pas d'archivage
+        archive_completed(days)
+
+def log_reminder_stats():
+    """Trace l'efficacité du regroupement des rappels."""
+    d = reminders.digest_stats
+    log.info("📊 Rappels : %d alertes en %d messages (%d récapitulatifs, %d messages économisés)",
+             d['alerts'], d['messages'], d['digests'], reminders.messages_saved(), extra={"reminders": d})
 
 # ==============================================================================
 # 4. RAPPORT HEBDOMADAIRE
 # ==============================================================================
 def weekly_report():
-    """Génère et envoie le bilan de la semaine."""
+    """Génère (agrégats SQL, voir modules/report.py) et envoie le bilan de la semaine."""
+    config = settings.get()
     try:
-        df = get_tasks(status='pending')
-        if df.empty:
-            send_telegram("📅 **Bilan Hebdo**\n\nBravo ! Aucune tâche en attente. 🎉")
-            return
-
-        total = len(df)
-        high_prio = len(df[df['priority'] == 3])
-        
-        msg = f"📅 **BILAN HEBDOMADAIRE**\nTotal : **{total}** tâches (Dont {high_prio} urgentes)\n"
-        
-        # On liste les 10 plus urgentes/vieilles
-        top_tasks = df.sort_values(by=['priority', 'due_date'], ascending=[False, True]).head(10)
-        
-        msg += "\n🔥 **Top Priorités :**\n"
-        for _, row in top_tasks.iterrows():
-            date_str = ""
-            if not pd.isna(row['due_date']):
-                date_str = f" ({row['due_date'].strftime('%d/%m')})"
-            
-            prio = "🔴" if row['priority'] == 3 else "🔵"
-            msg += f"{prio} {row['title']}{date_str}\n"
-            
-        send_telegram(msg)
-
-    except Exception as e:
-        print(f"❌ Erreur weekly_report: {e}")
+        send_telegram(build_weekly_report(
+            top_n=config['weekly_report_top'],
+            group_top_n=config['weekly_report_group_top'],
+        ))
+    except Exception:
+        log.exception("❌ Erreur weekly_report")
+
+def schedule_weekly_report(config):
+    """(Re)programme le rapport hebdo au jour / à l'heure de la config."""
+    global _report_job
+    if _report_job is not None:
+        schedule.cancel_job(_report_job)
+    day, at_time = config['weekly_report_day'], config['weekly_report_time']
+    # Magie python pour appeler schedule.every().friday dynamiquement (jour validé par settings)
+    _report_job = getattr(schedule.every(), day).at(at_time).do(weekly_report)
+    log.info("✅ Rapport hebdo programmé : %s à %s", day, at_time)
+
+def sync_config(force=False):
+    """Applique config.yaml s'il a changé depuis le dernier passage (ou si force=True)."""
+    global _applied_version
+    version, config = settings.snapshot()
+    if version == _applied_version and not force:
+        return
+    if _applied_version is not None and not force:
+        log.info("🔄 Nouvelle configuration appliquée au scheduler.")
+    _applied_version = version
+    reminders.configure(config['reminder_minutes'], config['reminder_digest'],
+                        config['reminder_digest_window_sec'])
+    schedule_weekly_report(config)
 
 # ==============================================================================
 # 5. BOUCLE PRINCIPALE
 # ==============================================================================
 def run_scheduler():
-    print("🕒 Scheduler V3 (Anti-Doublon) démarré...")
-    
-    # 1. Vérification fréquente (toutes les 10s) pour être précis
-    schedule.every(10).seconds.do(check_deadlines)
+    log.info("🕒 Scheduler V4 (Rappels événementiels) démarré...")
+    if not wait_for_leadership():
+        return
+    try:
+        log.info("📒 Registre anti-doublon : %d alertes récentes rechargées.", ledger.load())
+    except Exception:
+        log.exception("❌ Erreur chargement registre")
     
-    # 2. Nettoyage du cache toutes les heures
+    # 1. Les rappels sont pilotés par le moteur (voir boucle ci-dessous),
+    #    réveillé par les NOTIFY Postgres relayés par le listener
+    listener = start_listener()
+
+    # 2. Séries récurrentes : la prochaine occurrence doit entrer dans la fenêtre
+    #    des rappels à temps (les modifications réveillent le moteur via NOTIFY)
+    check_recurring()
+    schedule.every(RECURRENCE_EVERY_MIN).minutes.do(check_recurring)
+
+    # 3. Rétention : l'historique ancien quitte la table chaude
+    archive_old_tasks()
+    schedule.every(ARCHIVE_EVERY_MIN).minutes.do(archive_old_tasks)
+
+    # 4. Nettoyage du cache toutes les heures
     schedule.every(1).hour.do(clean_cache)
+    schedule.every(1).hour.do(log_pool_stats)
+    schedule.every(1).hour.do(log_cache_stats)
+    schedule.every(1).hour.do(log_telegram_stats)
+    schedule.every(1).hour.do(log_reminder_stats)
     
-    # 3. Programmation Hebdo dynamique
-    day = config.get('weekly_report_day', 'monday').lower()
-    at_time = config.get('weekly_report_time', '09:00')
-    print(f"🕒 Heure système du conteneur : {datetime.now()}")
-    # print(day, at_time)
-    
-    try:
-        # Magie python pour appeler schedule.every().day() dynamiquement
-        scheduler_job = getattr(schedule.every(), day)
-        scheduler_job.at(at_time).do(weekly_report)
-        print(f"✅ Rapport hebdo programmé : {day} à {at_time}")
-    except AttributeError:
-        print(f"❌ Erreur config jour : '{day}' n'est pas valide.")
-
-    # Boucle infinie
-    while True:
+    # 5. Réglages des rappels + programmation hebdo (puis rechargés à chaud dans la boucle)
+    log.info("🕒 Heure système du conteneur : %s", datetime.now())
+    sync_config(force=True)
+
+    # Boucle : on dort jusqu'au prochain rappel, job planifié ou battement de coeur
+    while not _shutdown.is_set():
+        if not leader.is_held():
+            SCHEDULER_LEADER.set(0)
+            log.warning("⚠️ Verrou scheduler perdu (connexion coupée).")
+            if not wait_for_leadership():
+                break
+            reminders.notify_change()
+        heartbeat("leader")
+        sync_config()
         schedule.run_pending()
-        time.sleep(5) # Pause courte pour ne pas surcharger le CPU
\ No newline at end of file
+        check_deadlines()
+        idle = schedule.idle_seconds()
+        timeout = min(reminders.seconds_until_next(), MAX_SLEEP, HEARTBEAT_INTERVAL)
+        if idle is not None:
+            timeout = min(timeout, idle)
+        reminders.wait(timeout)
+
+    # Arrêt propre : on rend le verrou tout de suite (l'instance en veille prend
+    # le relais sans attendre le timeout TCP) et on vide la file Telegram.
+    log.info("🛑 Arrêt du scheduler...")
+    schedule.clear()
+    listener.stop()
+    leader.release()
+    SCHEDULER_LEADER.set(0)
+    dispatcher = get_dispatcher()
+    if dispatcher is not None and not dispatcher.flush(timeout=10):
+        log.warning("⚠️ Messages Telegram encore en file à l'arrêt.")
+
+# ==============================================================================
+# 6. PROCESSUS AUTONOME (python -m modules.scheduler)
+# ==============================================================================
+def main():
+    parser = argparse.ArgumentParser(description="Scheduler PolyTask (rappels + rapport hebdo).")
+    parser.add_argument("--health", action="store_true",
+                        help="Vérifie le battement de coeur et sort (0 = sain, 1 = en panne).")
+    args = parser.parse_args()
+
+    if args.health:
+        ok, message = check_health()
+        print(f"{'✅' if ok else '❌'} Scheduler : {message}")
+        sys.exit(0 if ok else 1)
+
+    setup_logging()
+    signal.signal(signal.SIGTERM, stop_scheduler)
+    signal.signal(signal.SIGINT, stop_scheduler)
+    start_metrics_server()
+    init_db()
+    run_scheduler()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import copy
+import logging
+import os
+import re
+import threading
+import time
+import yaml
+from modules.retention import DEFAULT_ARCHIVE_DAYS, MIN_ARCHIVE_DAYS
+
+log = logging.getLogger(__name__)
+
+# ==============================================================================
+# CONFIGURATION (config/config.yaml validé, partagé, rechargé à chaud)
+# ==============================================================================
+# Un seul service par processus : le YAML est lu et validé une fois, puis
+# partagé par toutes les sessions Streamlit et par le scheduler. get() compare
+# la date de modification du fichier (au plus toutes les CHECK_INTERVAL s) et le
+# relit s'il a changé. Un fichier invalide est refusé : la configuration
+# précédente (ou les valeurs par défaut) reste en place et l'erreur est exposée.
+# La config retournée est partagée : ne pas la modifier en place.
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+CONFIG_PATH = os.getenv("POLYTASK_CONFIG", os.path.join(BASE_DIR, 'config', 'config.yaml'))
+CHECK_INTERVAL = 2.0  # Délai min entre deux stat() du fichier (s)
+
+WEEK_DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+DEFAULTS = {
+    'app_name': "PolyTask",
+    'priorities': {1: "Basse", 2: "Moyenne", 3: "Haute"},
+    'groups': [],
+    'page_size': 50,
+    'refresh_seconds': 60,
+    'weekly_report_day': "monday",
+    'weekly_report_time': "09:00",
+    'weekly_report_top': 10,
+    'weekly_report_group_top': 3,
+    'reminder_minutes': 5,
+    'reminder_digest': True,
+    'reminder_digest_window_sec': 0,
+    'archive_after_days': DEFAULT_ARCHIVE_DAYS,
+}
+
+class ConfigError(ValueError):
+    """Fichier de configuration absent, illisible ou invalide."""
+
+# --- 1. VALIDATION ---
+_TIME_RE = re.compile(r"^([01]\d|2[0-3]):[0-5]\d$")
+
+def _int(min_value=0):
+    return lambda v: isinstance(v, int) and not isinstance(v, bool) and v >= min_value
+
+def _priorities(value):
+    return (isinstance(value, dict) and value
+            and all(_int(0)(k) and isinstance(v, str) for k, v in value.items()))
+
+# clé -> (test, forme attendue)
+RULES = {
+    'app_name': (lambda v: isinstance(v, str) and v.strip(), "un texte non vide"),
+    'priorities': (_priorities, "{niveau entier: libellé}"),
+    'groups': (lambda v: isinstance(v, list), "une liste de noms"),
+    'page_size': (_int(1), "un entier ≥ 1"),
+    'refresh_seconds': (_int(5), "un entier ≥ 5"),
+    'weekly_report_day': (lambda v: isinstance(v, str) and v.lower() in WEEK_DAYS, " | ".join(WEEK_DAYS)),
+    'weekly_report_time': (lambda v: isinstance(v, str) and _TIME_RE.match(v), '"HH:MM" (entre guillemets)'),
+    'weekly_report_top': (_int(0), "un entier ≥ 0"),
+    'weekly_report_group_top': (_int(0), "un entier ≥ 0"),
+    'reminder_minutes': (_int(1), "un entier ≥ 1"),
+    'reminder_digest': (lambda v: isinstance(v, bool), "true | false"),
+    'reminder_digest_window_sec': (_int(0), "un entier ≥ 0"),
+    'archive_after_days': (lambda v: _int(0)(v) and (v == 0 or v >= MIN_ARCHIVE_DAYS),
+                           f"0 ou un entier ≥ {MIN_ARCHIVE_DAYS}"),
+}
+
+def validate(raw):
+    """YAML chargé -> config complète (défauts + valeurs du fichier). Lève ConfigError."""
+    if raw is None:
+        raw = {}
+    if not isinstance(raw, dict):
+        raise ConfigError("le fichier doit contenir des paires clé: valeur")
+    errors = [f"{key} : attendu {expected}, reçu {raw[key]!r}"
+              for key, (check, expected) in RULES.items()
+              if key in raw and not check(raw[key])]
+    if errors:
+        raise ConfigError(" ; ".join(errors))
+    unknown = sorted(set(raw) - set(RULES))
+    if unknown:
+        log.warning("⚠️ Clés de configuration inconnues ignorées : %s", ", ".join(map(str, unknown)))
+    config = copy.deepcopy(DEFAULTS)
+    config.update((key, raw[key]) for key in RULES if key in raw)
+    config['weekly_report_day'] = config['weekly_report_day'].lower()
+    return config
+
+def priority_ids(config):
+    """{libellé: niveau} (filtres et formulaire de l'UI)."""
+    return {label: level for level, label in config['priorities'].items()}
+
+# --- 2. SERVICE PARTAGÉ ---
+class ConfigService:
+    """Config validée, partagée par le processus et relue quand le fichier change."""
+
+    def __init__(self, path=CONFIG_PATH, check_interval=CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self.version = 0    # Incrémenté à chaque (re)chargement
+        self.error = None   # Erreur du fichier courant (None s'il est valide)
+        self._config = None
+        self._signature = None   # (mtime, taille) du fichier lu en dernier
+        self._checked_at = 0.0
+        self._derived = {}
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Config courante ; relit le fichier si sa date de modification a changé."""
+        if self._config is None or time.monotonic() - self._checked_at >= self.check_interval:
+            with self._lock:
+                if self._config is None or time.monotonic() - self._checked_at >= self.check_interval:
+                    self._checked_at = time.monotonic()
+                    self._reload_if_changed()
+        return self._config
+
+    def snapshot(self):
+        """(version, config) cohérents entre eux."""
+        self.get()
+        with self._lock:
+            return self.version, self._config
+
+    def derived(self, fn):
+        """fn(config) mémorisé jusqu'au prochain rechargement."""
+        self.get()
+        with self._lock:
+            if fn not in self._derived:
+                self._derived[fn] = fn(self._config)
+            return self._derived[fn]
+
+    def _reload_if_changed(self):
+        try:
+            st = os.stat(self.path)
+            signature = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            signature = None
+        if self._config is not None and signature == self._signature:
+            return
+        self._signature = signature
+        try:
+            if signature is None:
+                raise ConfigError(f"{self.path} introuvable")
+            with open(self.path) as f:
+                config = validate(yaml.safe_load(f))
+        except (ConfigError, OSError, yaml.YAMLError) as e:
+            self.error = str(e)
+            if self._config is None:
+                log.warning("⚠️ Configuration invalide (%s). Valeurs par défaut utilisées.", e)
+                self._apply(copy.deepcopy(DEFAULTS))
+            else:
+                log.error("❌ Configuration invalide (%s). Configuration précédente conservée.", e)
+            return
+        reloaded = self._config is not None
+        self.error = None
+        self._apply(config)
+        log.info("🔄 Configuration rechargée (v%d)." if reloaded else "✅ Configuration chargée (v%d).",
+                 self.version)
+
+    def _apply(self, config):
+        self._config = config
+        self._derived = {}
+        self.version += 1
+
+settings = ConfigService()
@@ -0,0 +1,31 @@
+from collections import namedtuple
+from database.models import Task
+
+# ==============================================================================
+# PRÉPARATION DES VUES (Enregistrements typés, sans Pandas)
+# ==============================================================================
+# query_tasks renvoie une page de Task (tuples nommés, dates Python natives) :
+# l'état de chaque tâche (en retard / à venir / sans date / terminée) et sa date
+# formatée sont ajoutés en une passe, sans DataFrame ni conversion de Timestamp.
+
+STATE_OVERDUE = 'overdue'
+STATE_UPCOMING = 'upcoming'
+STATE_NODATE = 'nodate'
+STATE_DONE = 'done'
+
+# Task + champs d'affichage
+TaskCard = namedtuple('TaskCard', Task._fields + ('state', 'due_str'))
+
+def classify_tasks(tasks, now, pending=True):
+    """[TaskCard, ...] : chaque Task complétée de `state` et `due_str` (None sans échéance)."""
+    cards = []
+    for task in tasks:
+        due = task.due_date
+        if not pending:
+            state = STATE_DONE
+        elif due is None:
+            state = STATE_NODATE
+        else:
+            state = STATE_OVERDUE if due < now else STATE_UPCOMING
+        cards.append(TaskCard(*task, state, due.strftime('%d/%m %H:%M') if due else None))
+    return cards
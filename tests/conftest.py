@@ -0,0 +1,75 @@
+import json
+import os
+import select
+import sys
+import time
+
+import pytest
+
+# ==============================================================================
+# FIXTURES COMMUNES DES TESTS
+# ==============================================================================
+# Les tests unitaires n'ont besoin de rien. Les tests Postgres tournent dans un
+# schéma dédié (par défaut 'polytask_test', recréé à chaque session) et sont
+# ignorés si aucune base n'est joignable via les variables DB_* (.env).
+TEST_SCHEMA = os.getenv("TEST_SCHEMA", "polytask_test")
+os.environ["PGOPTIONS"] = f"-c search_path={TEST_SCHEMA},public"
+os.environ.setdefault("PGCONNECT_TIMEOUT", "3")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from database.db import connect_dedicated, dispose_pool, init_db  # noqa: E402
+from database.listener import CHANNEL  # noqa: E402
+
+def wait_for(predicate, timeout=5.0, step=0.05):
+    """Attend que predicate() soit vrai (au plus `timeout` s). Retourne sa dernière valeur."""
+    deadline = time.monotonic() + timeout
+    while True:
+        result = predicate()
+        if result or time.monotonic() >= deadline:
+            return result
+        time.sleep(step)
+
+@pytest.fixture(scope="session")
+def pg():
+    """Connexion autocommit sur un schéma de test neuf (schema.sql appliqué)."""
+    try:
+        conn = connect_dedicated()
+    except Exception as e:
+        pytest.skip(f"Postgres injoignable : {e}")
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE")
+        cur.execute(f"CREATE SCHEMA {TEST_SCHEMA}")
+    dispose_pool()
+    init_db(force=True)
+    yield conn
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE")
+    conn.close()
+    dispose_pool()
+
+@pytest.fixture
+def notifications(pg):
+    """Connexion à l'écoute du canal des triggers ; appeler la fixture rend les payloads reçus."""
+    conn = connect_dedicated()
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"LISTEN {CHANNEL};")
+
+    def drain(timeout=0.5):
+        payloads = []
+        deadline = time.monotonic() + timeout
+        while (remaining := deadline - time.monotonic()) > 0:
+            if select.select([conn], [], [], remaining) == ([], [], []):
+                break
+            conn.poll()
+            while conn.notifies:
+                payloads.append(json.loads(conn.notifies.pop(0).payload))
+        return payloads
+
+    drain(0.1)  # Écritures d'autres tests
+    yield drain
+    conn.close()
@@ -0,0 +1,59 @@
+import time
+
+from database.cache import TTLCache
+
+def test_hit_after_first_load():
+    cache = TTLCache(ttl=60)
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_load("k", lambda: calls.append(1) or "v") == "v"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 2
+
+def test_entry_expires_after_ttl():
+    cache = TTLCache(ttl=0.01)
+    cache.get_or_load("k", lambda: 1)
+    time.sleep(0.02)
+    assert cache.get_or_load("k", lambda: 2) == 2
+    assert cache.stats()["expirations"] == 1
+
+def test_lru_eviction():
+    cache = TTLCache(ttl=60, max_size=2)
+    cache.get_or_load("a", lambda: 1)
+    cache.get_or_load("b", lambda: 2)
+    cache.get_or_load("a", lambda: 1)  # "a" devient la plus récente
+    cache.get_or_load("c", lambda: 3)
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+    assert cache.get_or_load("a", lambda: "reloaded") == 1
+    assert cache.get_or_load("b", lambda: "reloaded") == "reloaded"
+
+def test_invalidate_tables_is_targeted():
+    cache = TTLCache(ttl=60)
+    cache.get_or_load("tasks", lambda: 1, tables=("tasks",))
+    cache.get_or_load("groups", lambda: 2, tables=("task_groups",))
+    cache.invalidate_tables("tasks")
+    assert cache.get_or_load("tasks", lambda: "reloaded", tables=("tasks",)) == "reloaded"
+    assert cache.get_or_load("groups", lambda: "reloaded", tables=("task_groups",)) == 2
+
+def test_write_during_load_is_not_cached():
+    cache = TTLCache(ttl=60)
+
+    def loader():
+        cache.invalidate_tables("tasks")  # Écriture concurrente pendant la lecture
+        return "stale"
+
+    assert cache.get_or_load("k", loader, tables=("tasks",)) == "stale"
+    assert cache.stats()["stale_loads"] == 1
+    assert len(cache) == 0
+
+def test_full_invalidation_during_load_is_not_cached():
+    cache = TTLCache(ttl=60)
+
+    def loader():
+        cache.invalidate()
+        return "stale"
+
+    cache.get_or_load("k", loader, tables=("task_groups",))
+    assert len(cache) == 0
+    assert cache.get_or_load("k", lambda: "fresh") == "fresh"
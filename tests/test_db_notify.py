@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+from database.db import (add_group, add_series, add_task, add_tasks, delete_group, delete_many,
+                         get_data_version, get_cursor, mark_done, mark_done_many)
+
+# Triggers de schema.sql : un NOTIFY par instruction, compteur data_version.
+
+def payloads_for(received, table):
+    return [(p['op'], p['id']) for p in received if p['table'] == table]
+
+def test_single_row_write_notifies_with_id(notifications):
+    task_id = add_task("notify-single", None, None, 2, [], None)
+    mark_done(task_id)
+    assert payloads_for(notifications(), 'tasks') == [('INSERT', str(task_id)), ('UPDATE', str(task_id))]
+
+def test_bulk_write_notifies_once_without_id(notifications):
+    add_tasks({'title': f"notify-bulk-{i}"} for i in range(5))
+    with get_cursor() as cur:
+        cur.execute("SELECT id FROM tasks WHERE title LIKE 'notify-bulk-%'")
+        ids = [row[0] for row in cur.fetchall()]
+    mark_done_many(ids)
+    delete_many(ids)
+    assert payloads_for(notifications(), 'tasks') == [('INSERT', None), ('UPDATE', None), ('DELETE', None)]
+
+def test_statement_without_rows_is_silent(notifications):
+    with get_cursor() as cur:
+        cur.execute("UPDATE tasks SET title = title WHERE id = -1")
+    assert payloads_for(notifications(), 'tasks') == []
+
+def test_group_notify_carries_name(notifications):
+    assert add_group("Notify-Test")
+    delete_group("Notify-Test")
+    assert payloads_for(notifications(), 'task_groups') == [('INSERT', "Notify-Test"),
+                                                            ('DELETE', "Notify-Test")]
+
+def test_series_notify(notifications):
+    series_id = add_series("notify-series", None, None, 2, [], 'daily', 1,
+                           datetime.now() + timedelta(days=1))
+    assert payloads_for(notifications(), 'task_series') == [('INSERT', str(series_id))]
+
+def test_data_version_bumps_once_per_statement(pg):
+    add_tasks({'title': f"version-{i}"} for i in range(3))
+    with get_cursor() as cur:
+        cur.execute("SELECT id FROM tasks WHERE title LIKE 'version-%'")
+        ids = [row[0] for row in cur.fetchall()]
+    before, _ = get_data_version()
+    mark_done_many(ids)
+    after, _ = get_data_version()
+    assert after == before + 1
+
+def test_data_version_tracks_next_due(pg):
+    due = datetime.now() + timedelta(minutes=1)
+    task_id = add_task("version-due", None, None, 2, [], due)
+    _, next_due = get_data_version(due - timedelta(seconds=1))
+    assert next_due == due
+    mark_done(task_id)
+    _, next_due = get_data_version(due - timedelta(seconds=1))
+    assert next_due != due
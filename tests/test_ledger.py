@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from modules import ledger as ledger_module
+from modules.ledger import AlertLedger
+
+DUE = datetime(2030, 1, 1, 9, 0)
+
+@pytest.fixture
+def db(monkeypatch):
+    """Table sent_alerts simulée : {clé: sent_at}."""
+    rows = {}
+
+    def record(task_id, kind, due_date):
+        key = (task_id, kind, due_date)
+        if key in rows:
+            return False
+        rows[key] = datetime.now()
+        return True
+
+    monkeypatch.setattr(ledger_module, "record_sent_alert", record)
+    monkeypatch.setattr(ledger_module, "delete_sent_alert", lambda *key: rows.pop(key, None))
+    monkeypatch.setattr(ledger_module, "get_sent_alerts", lambda since: sorted(
+        (k + (sent_at,) for k, sent_at in rows.items() if sent_at >= since), key=lambda r: r[3]))
+    monkeypatch.setattr(ledger_module, "purge_sent_alerts", lambda before: before)
+    return rows
+
+def test_claim_once(db):
+    ledger = AlertLedger()
+    assert ledger.claim(1, "now", DUE)
+    assert not ledger.claim(1, "now", DUE)
+    assert (1, "now", DUE) in ledger
+    # Une tâche replanifiée est une nouvelle alerte
+    assert ledger.claim(1, "now", DUE + timedelta(hours=1))
+
+def test_database_arbitrates_between_processes(db):
+    AlertLedger().claim(1, "now", DUE)
+    assert not AlertLedger().claim(1, "now", DUE)
+
+def test_entries_expire_after_ttl(db):
+    ledger = AlertLedger(ttl_sec=0)
+    ledger.claim(1, "now", DUE)
+    assert (1, "now", DUE) not in ledger
+    assert len(ledger) == 0
+
+def test_release_forgets_claim(db):
+    ledger = AlertLedger()
+    ledger.claim(1, "now", DUE)
+    ledger.release(1, "now", DUE)
+    assert (1, "now", DUE) not in ledger
+    assert db == {}
+    assert ledger.claim(1, "now", DUE)
+
+def test_load_keeps_remaining_ttl(db):
+    now = datetime.now()
+    db[(1, "now", DUE)] = now - timedelta(seconds=30)
+    db[(2, "now", DUE)] = now - timedelta(seconds=90)   # Déjà expirée
+    ledger = AlertLedger(ttl_sec=60)
+    assert ledger.load() == 1
+    assert (1, "now", DUE) in ledger
+    assert (2, "now", DUE) not in ledger
+
+def test_purge_uses_ttl(db):
+    before = AlertLedger(ttl_sec=3600).purge()
+    assert abs((datetime.now() - timedelta(hours=1) - before).total_seconds()) < 5
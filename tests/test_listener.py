@@ -0,0 +1,67 @@
+import pytest
+
+from conftest import wait_for
+from database.events import ChangeEvent, subscribe
+from database.listener import ChangeListener
+
+@pytest.fixture
+def events():
+    """Événements reçus par le bus pendant le test."""
+    received = []
+    unsubscribe = subscribe(received.append)
+    yield received
+    unsubscribe()
+
+# --- Décodage des payloads (sans base) ---
+def test_dispatch_converts_task_id(events):
+    ChangeListener._dispatch('{"table": "tasks", "op": "UPDATE", "id": "42"}')
+    ChangeListener._dispatch('{"table": "tasks", "op": "DELETE", "id": null}')
+    ChangeListener._dispatch('{"table": "task_groups", "op": "INSERT", "id": "Dev"}')
+    assert events == [ChangeEvent('tasks', 'UPDATE', 42), ChangeEvent('tasks', 'DELETE', None),
+                      ChangeEvent('task_groups', 'INSERT', "Dev")]
+
+def test_dispatch_ignores_invalid_payload(events):
+    ChangeListener._dispatch("pas du json")
+    assert events == []
+
+# --- Listener réel ---
+@pytest.fixture
+def listener(pg):
+    thread = ChangeListener(poll_timeout=0.2, max_backoff=1)
+    thread.start()
+    yield thread
+    thread.stop()
+    thread.join(timeout=5)
+
+def resyncs(events):
+    return [e for e in events if e.op == 'RESYNC']
+
+def test_listener_relays_other_process_writes(pg, events, listener):
+    assert wait_for(lambda: resyncs(events))
+    # Écriture hors helpers de db.py : seul le listener peut la publier
+    with pg.cursor() as cur:
+        cur.execute("INSERT INTO tasks (title) VALUES ('listener-relay') RETURNING id")
+        task_id = cur.fetchone()[0]
+    assert wait_for(lambda: ChangeEvent('tasks', 'INSERT', task_id) in events)
+
+def test_listener_resyncs_after_reconnection(pg, events):
+    # Canal propre au test : seule la connexion de ce listener est coupée
+    thread = ChangeListener(channel="polytask_test_resync", poll_timeout=0.2, max_backoff=1)
+    thread.start()
+    try:
+        assert wait_for(lambda: resyncs(events))
+        with pg.cursor() as cur:
+            cur.execute("""
+                SELECT pg_terminate_backend(pid) FROM pg_stat_activity
+                WHERE query = %s AND pid <> pg_backend_pid()
+            """, (f"LISTEN {thread.channel};",))
+            assert cur.rowcount == 1
+        assert wait_for(lambda: len(resyncs(events)) >= 2, timeout=10)
+        # De nouveau à l'écoute après la reconnexion
+        with pg.cursor() as cur:
+            cur.execute("SELECT pg_notify(%s, %s)",
+                        (thread.channel, '{"table": "tasks", "op": "UPDATE", "id": "7"}'))
+        assert wait_for(lambda: ChangeEvent('tasks', 'UPDATE', 7) in events)
+    finally:
+        thread.stop()
+        thread.join(timeout=5)
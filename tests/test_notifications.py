@@ -0,0 +1,42 @@
+import pytest
+
+from modules.notifications import DeliveryError, TelegramDispatcher, split_message
+
+def test_short_message_is_untouched():
+    assert split_message("Bonjour", limit=20) == ["Bonjour"]
+
+def test_sections_stay_whole():
+    sections = ["a" * 8, "b" * 8, "c" * 8]
+    assert split_message("\n\n".join(sections), limit=20) == ["a" * 8 + "\n\n" + "b" * 8, "c" * 8]
+
+def test_long_section_is_split_on_lines():
+    section = "\n".join(["x" * 6] * 5)
+    chunks = split_message(section, limit=13)
+    assert chunks == ["x" * 6 + "\n" + "x" * 6] * 2 + ["x" * 6]
+
+def test_oversized_line_is_cut():
+    chunks = split_message("y" * 25, limit=10)
+    assert chunks == ["y" * 10, "y" * 10, "y" * 5]
+
+def test_chunks_respect_limit_and_keep_text():
+    message = "\n\n".join(f"Section {i}\n" + "\n".join(f"ligne {j} " * 3 for j in range(i)) for i in range(30))
+    chunks = split_message(message, limit=100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert "".join(chunks).replace("\n", "") == message.replace("\n", "")
+
+# --- Dispatcher : les échecs remontent à l'appelant ---
+def test_full_queue_raises():
+    dispatcher = TelegramDispatcher("token", ("1001",), workers=1, queue_size=1)  # Sans workers
+    dispatcher.submit("premier")
+    with pytest.raises(DeliveryError):
+        dispatcher.submit("second")
+    assert dispatcher.stats()["dropped"] == 1
+
+def test_abandoned_delivery_calls_on_failure(monkeypatch):
+    dispatcher = TelegramDispatcher("token", ("1001", "1002"), workers=2)
+    monkeypatch.setattr(dispatcher, "_deliver", lambda chat_id, message: chat_id == "1001")
+    failed = []
+    dispatcher.start()
+    dispatcher.submit("alerte", on_failure=lambda chat_id, message: failed.append((chat_id, message)))
+    assert dispatcher.flush(timeout=5)
+    assert failed == [("1002", "alerte")]
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+import pytest
+
+from modules.recurrence import FREQ_CHOICES, FREQ_DAILY, FREQ_MONTHLY, FREQ_WEEKLY, describe_rule
+
+@pytest.mark.parametrize("freq, every, expected", [
+    (FREQ_DAILY, 1, "Tous les jours"),
+    (FREQ_WEEKLY, 1, "Toutes les semaines"),
+    (FREQ_WEEKLY, 2, "Toutes les 2 semaines"),
+    (FREQ_MONTHLY, 3, "Tous les 3 mois"),
+])
+def test_describe_rule(freq, every, expected):
+    assert describe_rule(freq, every) == expected
+
+def test_describe_rule_with_end():
+    assert (describe_rule(FREQ_WEEKLY, 2, until_at=datetime(2030, 12, 31), max_count=10)
+            == "Toutes les 2 semaines, jusqu'au 31/12/2030, 10 fois")
+
+def test_every_form_choice_is_described():
+    for freq in FREQ_CHOICES.values():
+        if freq is not None:
+            assert describe_rule(freq)
@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.models import Deadline
+from modules import reminders
+from modules.reminders import KIND_NOW, KIND_PREVENT, RETRY_SEC, ReminderEngine
+
+NOW = datetime(2030, 1, 1, 9, 0)
+
+class FakeLedger:
+    """Registre en mémoire (sans expiration)."""
+
+    def __init__(self):
+        self.claimed = set()
+        self.released = []
+
+    def __contains__(self, key):
+        return key in self.claimed
+
+    def claim(self, task_id, kind, due_date):
+        key = (task_id, kind, due_date)
+        if key in self.claimed:
+            return False
+        self.claimed.add(key)
+        return True
+
+    def release(self, task_id, kind, due_date):
+        self.released.append((task_id, kind, due_date))
+        self.claimed.discard((task_id, kind, due_date))
+
+@pytest.fixture
+def deadlines(monkeypatch):
+    """Échéances renvoyées par get_upcoming_deadlines (liste modifiable)."""
+    rows = []
+    monkeypatch.setattr(reminders, "get_upcoming_deadlines", lambda **kwargs: list(rows))
+    return rows
+
+@pytest.fixture
+def sent(monkeypatch):
+    messages = []
+    monkeypatch.setattr(reminders, "send_telegram", lambda message, on_failure=None: messages.append(message))
+    return messages
+
+def deadline(task_id, due_date):
+    return Deadline(task_id, f"Tâche {task_id}", due_date, 2, "Dev")
+
+def test_alerts_fire_at_prevent_and_due_time(deadlines, sent):
+    due = NOW + timedelta(minutes=5)
+    deadlines.append(deadline(1, due))
+    ledger = FakeLedger()
+    engine = ReminderEngine(reminder_minutes=5, ledger=ledger)
+    assert engine.run_pending(NOW - timedelta(seconds=1)) == 0
+    assert engine.run_pending(NOW) == 1
+    assert "RAPPEL -5 min" in sent[0]
+    assert ledger.claimed == {(1, KIND_PREVENT, due)}
+    assert engine.run_pending(NOW + timedelta(minutes=5)) == 1
+    assert "C'EST L'HEURE" in sent[1]
+
+def test_missed_alerts_beyond_grace_are_dropped(deadlines, sent):
+    deadlines.append(deadline(1, NOW - timedelta(seconds=30)))   # Dans la grâce
+    deadlines.append(deadline(2, NOW - timedelta(minutes=10)))  # Trop ancienne
+    ledger = FakeLedger()
+    engine = ReminderEngine(reminder_minutes=5, ledger=ledger, grace_sec=60, digest=False)
+    assert engine.run_pending(NOW) == 1
+    assert ledger.claimed == {(1, KIND_NOW, NOW - timedelta(seconds=30))}
+
+def test_change_during_reload_is_not_lost(deadlines, sent, monkeypatch):
+    engine = ReminderEngine(reminder_minutes=5, ledger=FakeLedger())
+
+    def racing_query(**kwargs):
+        engine.notify_change()  # NOTIFY reçu pendant la lecture
+        return []
+
+    monkeypatch.setattr(reminders, "get_upcoming_deadlines", racing_query)
+    engine.reload(NOW)
+    assert engine.seconds_until_next(NOW) == 0
+
+def test_simultaneous_alerts_are_digested(deadlines, sent):
+    deadlines.extend(deadline(i, NOW) for i in (1, 2, 3))
+    engine = ReminderEngine(reminder_minutes=5, ledger=FakeLedger())
+    assert engine.run_pending(NOW) == 3
+    assert len(sent) == 1 and "3 RAPPELS" in sent[0]
+    assert engine.digest_stats == {"alerts": 3, "messages": 1, "digests": 1}
+    assert engine.messages_saved() == 2
+
+def test_digest_disabled_sends_one_message_per_alert(deadlines, sent):
+    deadlines.extend(deadline(i, NOW) for i in (1, 2))
+    engine = ReminderEngine(reminder_minutes=5, ledger=FakeLedger(), digest=False)
+    assert engine.run_pending(NOW) == 2
+    assert len(sent) == 2
+
+def test_digest_window_groups_close_alerts(deadlines, sent):
+    deadlines.append(deadline(1, NOW))
+    deadlines.append(deadline(2, NOW + timedelta(seconds=20)))
+    engine = ReminderEngine(reminder_minutes=5, ledger=FakeLedger(), digest_window_sec=30)
+    assert engine.run_pending(NOW) == 0  # On attend la fin de la fenêtre
+    assert engine.run_pending(NOW + timedelta(seconds=30)) == 2
+    assert len(sent) == 1
+
+def test_failed_send_is_released_and_retried(deadlines, monkeypatch):
+    deadlines.append(deadline(1, NOW))
+    messages = []
+
+    def flaky(message, on_failure=None):
+        if not messages:
+            messages.append(None)
+            raise ConnectionError("Telegram injoignable")
+        messages.append(message)
+
+    monkeypatch.setattr(reminders, "send_telegram", flaky)
+    ledger = FakeLedger()
+    engine = ReminderEngine(reminder_minutes=5, ledger=ledger)
+    assert engine.run_pending(NOW) == 0
+    assert ledger.released == [(1, KIND_NOW, NOW)]
+    # La nouvelle tentative survit à un rechargement, même après la grâce
+    engine.notify_change()
+    assert engine.run_pending(NOW + timedelta(seconds=RETRY_SEC)) == 1
+    assert (1, KIND_NOW, NOW) in ledger
+
+def test_already_claimed_alerts_are_skipped(deadlines, sent):
+    deadlines.append(deadline(1, NOW))
+    ledger = FakeLedger()
+    ledger.claim(1, KIND_NOW, NOW)
+    engine = ReminderEngine(reminder_minutes=5, ledger=ledger)
+    assert engine.run_pending(NOW) == 0
+    assert sent == []
+
+def test_undelivered_message_is_released_and_retried(deadlines, monkeypatch):
+    deadlines.extend(deadline(i, NOW) for i in (1, 2))
+    failures = []
+    monkeypatch.setattr(reminders, "send_telegram",
+                        lambda message, on_failure=None: failures.append(on_failure))
+    ledger = FakeLedger()
+    engine = ReminderEngine(reminder_minutes=5, ledger=ledger)
+    assert engine.run_pending(NOW) == 2
+    # Le worker Telegram abandonne le digest, pour deux chats
+    failures[0]("1001", "digest")
+    failures[0]("1002", "digest")
+    assert engine._wake.is_set()  # Le scheduler est réveillé
+    later = NOW + timedelta(seconds=1)
+    assert engine.run_pending(later) == 0
+    assert sorted(ledger.released) == [(1, KIND_NOW, NOW), (2, KIND_NOW, NOW)]
+    assert engine.run_pending(later + timedelta(seconds=RETRY_SEC)) == 2
+    assert len(failures) == 2
+
+def test_alert_due_before_task_creation_is_not_missed(deadlines, sent):
+    missed = reminders.REMINDERS_MISSED.labels(KIND_PREVENT)
+    before = missed._value.get()
+    # Créée 2 min avant l'échéance : son rappel "-5 min" était déjà passé
+    deadlines.append(deadline(1, NOW + timedelta(minutes=2))._replace(created_at=NOW - timedelta(seconds=5)))
+    deadlines.append(deadline(2, NOW + timedelta(minutes=2))._replace(created_at=NOW - timedelta(hours=1)))
+    engine = ReminderEngine(reminder_minutes=5, ledger=FakeLedger())
+    engine.run_pending(NOW)
+    assert missed._value.get() == before + 1  # Seule la tâche 2 (créée à temps) compte
@@ -0,0 +1,41 @@
+from datetime import date, datetime, timedelta
+
+from modules import report
+from modules.report import format_weekly_report
+
+def make_stats(**totals):
+    base = {'pending': 4, 'urgent': 1, 'overdue': 2, 'nodate': 1, 'created': 10, 'done': 14,
+            'lead_time': timedelta(hours=3, minutes=20), 'series': 0, 'recurring_done': 0}
+    base.update(totals)
+    top = [{'id': 1, 'title': "Certificat", 'group_name': "Root", 'priority': 3,
+            'due_date': datetime(2030, 1, 4, 9, 0)}]
+    return {'totals': base,
+            'per_day': [(date(2030, 1, 1) + timedelta(days=i), i) for i in range(7)],
+            'groups': [{'group': "Root", 'pending': 4, 'urgent': 1, 'overdue': 2, 'done': 14}],
+            'top': top, 'group_top': {"Root": top}}
+
+def test_report_sections():
+    text = format_weekly_report(make_stats())
+    assert "Total : **4** tâches (Dont 1 urgentes)" in text
+    assert "Terminées : **14** (2.0/jour)" in text
+    assert "Solde : -4" in text
+    assert "3h 20min" in text
+    assert "🔴 Certificat (04/01)" in text
+    assert "📂 **Root** : 4 en attente" in text
+
+def test_per_day_line_has_each_weekday_once():
+    line = next(l for l in format_weekly_report(make_stats()).splitlines() if l.startswith("Mar 0"))
+    assert line == "Mar 0 · Mer 1 · Jeu 2 · Ven 3 · Sam 4 · Dim 5 · Lun 6"
+
+def test_nothing_pending():
+    text = format_weekly_report(make_stats(pending=0, lead_time=None), per_group=False)
+    assert "Aucune tâche en attente" in text
+    assert "Délai moyen" not in text and "📂" not in text
+
+def test_report_covers_whole_days(monkeypatch):
+    calls = []
+    monkeypatch.setattr(report, "get_weekly_stats",
+                        lambda since, now, **kwargs: calls.append(since) or make_stats())
+    report.build_weekly_report(datetime(2030, 1, 7, 9, 30))
+    # 7 jours, aujourd'hui compris : du mardi 1er à minuit au lundi 7
+    assert calls == [datetime(2030, 1, 1)]
@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+
+from database.db import add_series, get_cursor, mark_done, refresh_series
+
+# Occurrences des séries : dates et created_at à l'heure de l'application (polytask.now).
+
+APP_NOW = datetime(2031, 6, 15, 12, 0)  # Volontairement loin de l'horloge de la base
+
+def pending_occurrence(series_id):
+    with get_cursor() as cur:
+        cur.execute("SELECT id, due_date, created_at FROM tasks WHERE series_id = %s AND status = 'pending'",
+                    (series_id,))
+        return cur.fetchone()
+
+def test_occurrences_use_app_clock(pg):
+    series_id = add_series("series-clock", None, None, 2, [], 'daily', 1, datetime(2020, 1, 1, 9, 0),
+                           now=APP_NOW)
+    task_id, due, created_at = pending_occurrence(series_id)
+    assert (due, created_at) == (datetime(2020, 1, 1, 9, 0), APP_NOW)
+    # Terminée -> suivante après "maintenant" (celui de l'app, pas LOCALTIMESTAMP)
+    mark_done(task_id, now=APP_NOW)
+    _, due, created_at = pending_occurrence(series_id)
+    assert (due, created_at) == (datetime(2031, 6, 16, 9, 0), APP_NOW)
+
+def test_refresh_creates_missing_occurrence_with_app_clock(pg):
+    series_id = add_series("series-refresh", None, None, 2, [], 'weekly', 1, datetime(2031, 6, 20, 9, 0),
+                           now=APP_NOW)
+    with get_cursor() as cur:
+        # Série sans occurrence (le trigger n'en recrée pas pour une série inactive)
+        cur.execute("UPDATE task_series SET active = FALSE WHERE id = %s", (series_id,))
+        cur.execute("DELETE FROM tasks WHERE series_id = %s", (series_id,))
+        cur.execute("UPDATE task_series SET active = TRUE WHERE id = %s", (series_id,))
+    later = APP_NOW + timedelta(days=1)
+    assert refresh_series(3600, now=later)['created'] >= 1
+    _, due, created_at = pending_occurrence(series_id)
+    assert (due, created_at) == (datetime(2031, 6, 20, 9, 0), later)
@@ -0,0 +1,59 @@
+import pytest
+
+from modules.settings import DEFAULTS, ConfigError, ConfigService, validate
+
+def test_empty_file_gives_defaults():
+    assert validate(None) == DEFAULTS
+    assert validate({}) == DEFAULTS
+
+def test_values_override_defaults():
+    config = validate({'page_size': 20, 'weekly_report_day': "Friday"})
+    assert config['page_size'] == 20
+    assert config['weekly_report_day'] == "friday"
+    assert config['refresh_seconds'] == DEFAULTS['refresh_seconds']
+
+@pytest.mark.parametrize("raw", [
+    {'page_size': 0},
+    {'page_size': True},
+    {'refresh_seconds': 2},
+    {'weekly_report_time': "9h"},
+    {'weekly_report_day': "lundi"},
+    {'reminder_digest': "yes"},
+    {'priorities': {}},
+    {'archive_after_days': 3},
+])
+def test_invalid_values_are_refused(raw):
+    with pytest.raises(ConfigError, match=next(iter(raw))):
+        validate(raw)
+
+def test_all_errors_are_reported():
+    with pytest.raises(ConfigError) as excinfo:
+        validate({'page_size': 0, 'refresh_seconds': 1})
+    assert "page_size" in str(excinfo.value) and "refresh_seconds" in str(excinfo.value)
+
+def test_archiving_can_be_disabled():
+    assert validate({'archive_after_days': 0})['archive_after_days'] == 0
+
+def test_unknown_keys_are_ignored():
+    assert 'colour' not in validate({'colour': "bleu"})
+
+def test_not_a_mapping():
+    with pytest.raises(ConfigError):
+        validate(["page_size"])
+
+def test_invalid_reload_keeps_previous_config(tmp_path):
+    path = tmp_path / "config.yaml"
+    path.write_text("page_size: 20\n")
+    service = ConfigService(path=str(path), check_interval=0)
+    assert service.get()['page_size'] == 20 and service.error is None
+    path.write_text("page_size: -1\nrefresh_seconds: 30\n")
+    assert service.get()['page_size'] == 20
+    assert "page_size" in service.error
+    path.write_text("page_size: 30\n")
+    assert service.get()['page_size'] == 30 and service.error is None
+    assert service.version == 2
+
+def test_missing_file_uses_defaults(tmp_path):
+    service = ConfigService(path=str(tmp_path / "absent.yaml"), check_interval=0)
+    assert service.get() == DEFAULTS
+    assert service.error
@@ -0,0 +1,38 @@
+import io
+from datetime import datetime
+
+import pytest
+
+from database.db import _task_values
+from database.transfer import _parse_task, read_tasks
+
+NOW = datetime(2030, 1, 1, 9, 0)
+
+def test_parse_csv_strings():
+    task = _parse_task({'title': "Backup", 'priority': "3", 'tags': "dev, ,urgent", 'status': "done",
+                        'due_date': "2030-01-02T10:00:00", 'completed_at': "2030-01-01T08:00:00",
+                        'description': "", 'id': "12"})
+    assert task == {'title': "Backup", 'description': None, 'group_name': None, 'priority': 3,
+                    'tags': ["dev", "urgent"], 'due_date': datetime(2030, 1, 2, 10, 0), 'status': "done",
+                    'created_at': None, 'completed_at': datetime(2030, 1, 1, 8, 0)}
+
+def test_parse_requires_title():
+    with pytest.raises(ValueError):
+        _parse_task({'title': ""})
+
+def test_read_csv_and_json_lines():
+    csv_file = io.StringIO("title,tags,status\nA,\"x,y\",pending\nB,,done\n")
+    json_file = io.StringIO('{"title": "A", "tags": ["x", "y"]}\n\n{"title": "B", "status": "done"}\n')
+    from_csv = list(read_tasks(csv_file, "csv"))
+    from_json = list(read_tasks(json_file, "json"))
+    assert [t['title'] for t in from_csv] == [t['title'] for t in from_json] == ["A", "B"]
+    assert from_csv[0]['tags'] == from_json[0]['tags'] == ["x", "y"]
+
+def test_done_task_without_completed_at_gets_now():
+    values = _task_values({'title': "B", 'status': "done"}, NOW)
+    assert values[-2:] == (NOW, NOW)  # created_at, completed_at
+
+def test_pending_task_keeps_dates():
+    created = datetime(2029, 12, 1)
+    values = _task_values({'title': "A", 'created_at': created}, NOW)
+    assert values[-3:] == ("pending", created, None)
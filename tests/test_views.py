@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+
+from database.models import Task
+from modules.views import STATE_DONE, STATE_NODATE, STATE_OVERDUE, STATE_UPCOMING, classify_tasks
+
+NOW = datetime(2030, 1, 1, 9, 0)
+
+def task(task_id, due_date):
+    return Task(task_id, f"Tâche {task_id}", None, "Dev", 2, [], due_date, 'pending', None, None, None)
+
+def test_states_and_dates():
+    tasks = [task(1, NOW - timedelta(minutes=1)), task(2, NOW), task(3, None)]
+    cards = classify_tasks(tasks, NOW)
+    assert [(c.id, c.state, c.due_str) for c in cards] == [
+        (1, STATE_OVERDUE, "01/01 08:59"),
+        (2, STATE_UPCOMING, "01/01 09:00"),
+        (3, STATE_NODATE, None),
+    ]
+
+def test_done_view():
+    cards = classify_tasks([task(1, NOW - timedelta(days=1)), task(2, None)], NOW, pending=False)
+    assert {c.state for c in cards} == {STATE_DONE}
+
+def test_cards_keep_task_fields_and_order():
+    tasks = [task(i, None) for i in (3, 1, 2)]
+    cards = classify_tasks(tasks, NOW)
+    assert [c.id for c in cards] == [3, 1, 2]
+    assert cards[0][:len(Task._fields)] == tuple(tasks[0])